@@ -0,0 +1,224 @@
+# DASHBOARD/artifact_store.py
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+ARTIFACT_DIR = os.environ.get(
+    "DASHBOARD_ARTIFACT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "dashboard", "artifacts"),
+)
+# Artifacts not downloaded or re-shared for this long are deleted
+ARTIFACT_TTL_SECONDS = int(os.environ.get("DASHBOARD_ARTIFACT_TTL_HOURS", "24")) * 3600
+ARTIFACT_HOST = os.environ.get("DASHBOARD_ARTIFACT_HOST", "127.0.0.1")
+ARTIFACT_PORT = int(os.environ.get("DASHBOARD_ARTIFACT_PORT", "8765"))
+# Address under which viewers reach the server (e.g. a reverse proxy path on
+# the app's host). Share links are only created when it is set.
+ARTIFACT_BASE_URL = os.environ.get("DASHBOARD_ARTIFACT_BASE_URL", "").rstrip("/")
+
+_CHUNK_SIZE = 1024**2
+_CLEANUP_INTERVAL = 600
+_ID = re.compile(r"^[0-9a-f]{32}$")
+_SECRET_FILE = ".secret"
+
+_server = None
+_server_lock = threading.Lock()
+_last_cleanup = 0.0
+
+
+def _path(artifact_id):
+    return os.path.join(ARTIFACT_DIR, artifact_id)
+
+
+def _meta_path(artifact_id):
+    return os.path.join(ARTIFACT_DIR, f"{artifact_id}.json")
+
+
+def _secret():
+    # Shared by every process using the directory; created on first use
+    path = os.path.join(ARTIFACT_DIR, _SECRET_FILE)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(32))
+    except FileExistsError:
+        pass
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def put(data, filename, mime="application/octet-stream"):
+    """
+    Store an artifact under an id derived from its content.
+
+    The id is an HMAC of the content with a secret kept in the artifact
+    directory, so links cannot be guessed from the data. The same content
+    always gets the same id, so re-sharing only refreshes the artifact's TTL.
+
+    Args:
+        data (bytes | Iterable[bytes]): Content, or chunks of it, written
+            to disk as they arrive.
+        filename (str): Name offered to the browser on download.
+        mime (str): Content type served with the artifact.
+
+    Returns:
+        str: Artifact id.
+    """
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    chunks = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+    digest = hmac.new(_secret(), digestmod=hashlib.sha256)
+    tmp_path = os.path.join(ARTIFACT_DIR, f"{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+        artifact_id = digest.hexdigest()[:32]
+        with open(f"{tmp_path}.json", "w") as f:
+            json.dump({"filename": filename, "mime": mime}, f)
+        os.replace(f"{tmp_path}.json", _meta_path(artifact_id))
+        os.replace(tmp_path, _path(artifact_id))
+    finally:
+        for leftover in (tmp_path, f"{tmp_path}.json"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    _maybe_cleanup()
+    return artifact_id
+
+
+def open_artifact(artifact_id):
+    """
+    Open a stored artifact for reading.
+
+    Returns:
+        tuple[file, dict] | None: Binary file object and its metadata
+        (``filename``, ``mime``), or None if it does not exist or expired.
+    """
+    if not _ID.match(artifact_id):
+        return None
+    try:
+        with open(_meta_path(artifact_id)) as f:
+            meta = json.load(f)
+        if time.time() - os.stat(_path(artifact_id)).st_mtime > ARTIFACT_TTL_SECONDS:
+            return None
+        os.utime(_path(artifact_id))  # Downloads keep an artifact alive
+        return open(_path(artifact_id), "rb"), meta
+    except (OSError, ValueError):
+        return None
+
+
+def links_available():
+    """
+    Whether share links can be handed out: a public base URL is configured
+    and this process's artifact server is listening.
+    """
+    return bool(ARTIFACT_BASE_URL) and ensure_server()
+
+
+def _require_links():
+    if not links_available():
+        raise RuntimeError("Share links need DASHBOARD_ARTIFACT_BASE_URL and a free DASHBOARD_ARTIFACT_PORT.")
+
+
+def link(artifact_id, filename):
+    """
+    Stable download URL of an artifact.
+
+    Raises:
+        RuntimeError: If links are not available, see :func:`links_available`.
+    """
+    _require_links()
+    return f"{ARTIFACT_BASE_URL}/a/{artifact_id}/{quote(filename)}"
+
+
+def share(data, filename, mime="application/octet-stream"):
+    """
+    Store content and return its download link.
+
+    Raises:
+        RuntimeError: If links are not available, see :func:`links_available`.
+    """
+    _require_links()
+    return link(put(data, filename, mime), filename)
+
+
+def cleanup(ttl=ARTIFACT_TTL_SECONDS):
+    """
+    Delete artifacts older than ``ttl`` seconds.
+
+    Returns:
+        int: Number of artifacts removed.
+    """
+    if not os.path.isdir(ARTIFACT_DIR):
+        return 0
+    removed = 0
+    cutoff = time.time() - ttl
+    for name in os.listdir(ARTIFACT_DIR):
+        path = os.path.join(ARTIFACT_DIR, name)
+        try:
+            if _ID.match(name) and os.stat(path).st_mtime < cutoff:
+                os.remove(path)
+                if os.path.exists(_meta_path(name)):
+                    os.remove(_meta_path(name))
+                removed += 1
+        except OSError:  # Removed concurrently
+            pass
+    return removed
+
+
+def _maybe_cleanup():
+    global _last_cleanup
+    if time.time() - _last_cleanup > _CLEANUP_INTERVAL:
+        _last_cleanup = time.time()
+        cleanup()
+
+
+class _ArtifactHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        opened = open_artifact(parts[1]) if len(parts) >= 2 and parts[0] == "a" else None
+        if opened is None:
+            self.send_error(404, "Artifact not found or expired")
+            return
+        f, meta = opened
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", meta["mime"])
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(meta['filename'])}")
+            self.send_header("Cache-Control", "private, max-age=3600")
+            self.end_headers()
+            # Stream from disk; the artifact is never held in memory as a whole
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                self.wfile.write(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def ensure_server():
+    """
+    Start the artifact HTTP server in a daemon thread, once per process.
+
+    Returns:
+        bool: True if this process serves artifacts. False if the port is
+        taken by something else, in which case no links are handed out.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((ARTIFACT_HOST, ARTIFACT_PORT), _ArtifactHandler)
+            except OSError:
+                _server = False
+                return False
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="artifact-server", daemon=True).start()
+        return bool(_server)
@@ -0,0 +1,124 @@
+# DASHBOARD/chart_export.py
+
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from DASHBOARD.memory_cache import BoundedCache
+
+EXPORT_CACHE_BYTES = int(os.environ.get("DASHBOARD_EXPORT_CACHE_MB", "128")) * 1024**2
+# Each PNG export drives a kaleido browser process, so keep the pool small
+EXPORT_WORKERS = int(os.environ.get("DASHBOARD_EXPORT_WORKERS", "2"))
+FORMATS = {
+    "png": "image/png",
+    "html": "text/html",
+}
+
+_exports = BoundedCache(EXPORT_CACHE_BYTES)
+_executor = ThreadPoolExecutor(EXPORT_WORKERS, thread_name_prefix="chart-export")
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def png_available():
+    """
+    Whether static image export (kaleido) is installed.
+    """
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def formats():
+    """
+    Export formats usable in this environment.
+    """
+    return [fmt for fmt in FORMATS if fmt != "png" or png_available()]
+
+
+def figure_key(fig):
+    """
+    Content hash of a figure; equal figures share their exports.
+    """
+    return hashlib.sha256(fig.to_json().encode()).hexdigest()
+
+
+def _render(fig, fmt):
+    if fmt == "png":
+        return fig.to_image(format="png")
+    if fmt == "html":
+        buffer = io.StringIO()
+        fig.write_html(buffer)
+        return buffer.getvalue().encode()
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def submit(fig, fmt):
+    """
+    Start rendering a figure export in the background.
+
+    Concurrent requests for the same figure and format share one job, and
+    finished exports are served from the cache.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the exported bytes.
+    """
+    key = (figure_key(fig), fmt)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _executor.submit(_export, key, fig, fmt)
+            _pending[key] = future
+    return future
+
+
+def _export(key, fig, fmt):
+    try:
+        data = _exports.get(key)
+        if data is None:
+            data = _exports.put(key, _render(fig, fmt))
+        return data
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+
+
+def export(fig, fmt):
+    """
+    Exported bytes of a figure, rendered on the export pool and cached.
+    """
+    data = _exports.get((figure_key(fig), fmt))
+    return data if data is not None else submit(fig, fmt).result()
+
+
+def exporter(fig, fmt):
+    """
+    Zero-argument callable for ``st.download_button``.
+
+    Streamlit only calls it when the button is clicked, so nothing is
+    rendered on reruns that do not download.
+    """
+    return lambda: export(fig, fmt)
+
+
+def export_zip(figures, fmts=None):
+    """
+    Export several figures into one ZIP archive.
+
+    Args:
+        figures (dict[str, plotly.graph_objects.Figure]): Figures by file stem.
+        fmts (list[str]): Formats to include; defaults to :func:`formats`.
+
+    Returns:
+        bytes: ZIP archive with one ``<name>.<fmt>`` entry per figure and format.
+    """
+    fmts = fmts or formats()
+    # Start every export first so they render concurrently
+    jobs = {(name, fmt): submit(fig, fmt) for name, fig in figures.items() for fmt in fmts}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for (name, fmt), future in jobs.items():
+            archive.writestr(f"{name}.{fmt}", future.result())
+    return buffer.getvalue()
@@ -0,0 +1,76 @@
+# DASHBOARD/chart_render.py
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Traces with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = int(os.environ.get("DASHBOARD_WEBGL_THRESHOLD", "1000"))
+RENDERERS = ["Auto", "SVG", "WebGL"]
+
+
+def render_mode(points, renderer="Auto"):
+    """
+    Plotly ``render_mode`` for a chart with ``points`` markers.
+
+    Args:
+        points (int): Number of points the chart draws.
+        renderer (str): One of ``RENDERERS``; anything but "Auto" overrides
+            the threshold.
+
+    Returns:
+        str: ``"webgl"`` or ``"svg"``.
+    """
+    if renderer == "WebGL":
+        return "webgl"
+    if renderer == "SVG":
+        return "svg"
+    return "webgl" if points > WEBGL_THRESHOLD else "svg"
+
+
+def scatter_trace(mode):
+    """
+    Graph-objects scatter class for a render mode.
+    """
+    return go.Scattergl if mode == "webgl" else go.Scatter
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), repeat=3):
+    """
+    Time figure construction and JSON serialization of a scatter plot
+    rendered as SVG and as WebGL.
+
+    Browser-side drawing, where WebGL makes the real difference, is not
+    measured; this only covers the server-side cost of each choice.
+
+    Returns:
+        list[dict]: One row per (size, mode) with best-of-``repeat`` build and
+        serialization seconds and the payload size.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        data = pd.DataFrame({"x": rng.random(size), "y": rng.random(size)})
+        for mode in ("svg", "webgl"):
+            build = serialize = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fig = px.scatter(data, x="x", y="y", render_mode=mode)
+                built = time.perf_counter()
+                payload = fig.to_json()
+                done = time.perf_counter()
+                build, serialize = min(build, built - start), min(serialize, done - built)
+            results.append({
+                "points": size, "mode": mode, "trace": fig.data[0].type,
+                "build_s": round(build, 4), "serialize_s": round(serialize, 4),
+                "payload_mb": round(len(payload) / 1024**2, 2),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    print(pd.DataFrame(benchmark()).to_string(index=False))
@@ -4,14 +4,27 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import base64
 import io
 from io import BytesIO, StringIO
 
+from DASHBOARD.artifact_store import links_available, share
+from DASHBOARD.chart_export import export_zip, exporter, png_available
+from DASHBOARD.chart_render import RENDERERS, render_mode, scatter_trace
+from DASHBOARD.data_profile import columns_of, get_profile
+from DASHBOARD.dataset_cache import dataset_key
+from DASHBOARD.downsample import POINT_BUDGET, can_downsample, downsample_traces
+from DASHBOARD.pipeline import figure_size, run_stage
+from DASHBOARD.rollup_cube import aggregate
+from DASHBOARD.sketches import distinct_count, quantiles
 
+
+@st.fragment
 def display_charts(df):
     """
     Display a variety of interactive charts with download and share options.
+
+    Runs as a fragment: chart widgets rerun only this section, and figures
+    are cached per dataset and chart settings.
     """
     st.subheader("📊 Chart Builder")
     st.markdown("---")
@@ -25,7 +38,8 @@ def display_charts(df):
         """, unsafe_allow_html=True
     )
 
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    profile = get_profile(df)
+    numeric_cols = columns_of(profile, "numeric")
     all_cols = df.columns.tolist()
 
     chart_type = st.selectbox(
@@ -39,48 +53,87 @@ def display_charts(df):
     x_axis = st.selectbox("X-Axis", options=all_cols)
     y_axis = st.multiselect("Y-Axis", options=numeric_cols)
     color_by = st.selectbox("Color By (optional)", options=[None] + all_cols)
+    renderer = "Auto"
+    if chart_type in ('Line', 'Scatter', 'Bubble', 'Pareto'):
+        # Auto switches to WebGL for large point counts
+        renderer = st.selectbox("Renderer", RENDERERS, key="chart_renderer")
+
+    # Long series are downsampled; narrowing the range brings back full detail
+    source, chosen = df, None
+    if chart_type in ('Line', 'Area', 'Scatter') and x_axis and len(df) > POINT_BUDGET \
+            and can_downsample(df[x_axis]):
+        x_range = _range_bounds(profile["columns"][x_axis])
+        if x_range:
+            chosen = tuple(st.slider("X-Axis Range", x_range[0], x_range[1], x_range, key=f"range_{x_axis}"))
+            if chosen != x_range:
+                df = df[df[x_axis].between(chosen[0], chosen[1])]
+            else:
+                chosen = None
 
     if x_axis and y_axis:
         try:
-            # Generate the figure
-            fig = create_figure(df, chart_type, x_axis, y_axis, color_by)
-            fig.update_layout(
-                transition_duration=500,
-                hovermode='x unified',
-                hoverlabel=dict(bgcolor='white', font_size=13)
+            # Chart stage: built once per dataset, range and chart settings
+            def build():
+                fig = create_figure(df, chart_type, x_axis, y_axis, color_by, renderer)
+                fig.update_layout(
+                    transition_duration=500,
+                    hovermode='x unified',
+                    hoverlabel=dict(bgcolor='white', font_size=13)
+                )
+                return fig
+            fig = run_stage(
+                "chart", source, {"chart": (chosen, chart_type, x_axis, tuple(y_axis), color_by, renderer)},
+                build, size=figure_size
             )
 
             # Display chart
             st.plotly_chart(fig, use_container_width=True)
 
-            # Download chart as HTML
-            buf_html = StringIO()
-            fig.write_html(buf_html)
-            html_bytes = buf_html.getvalue().encode()
+            # Exports are rendered off the script thread only when clicked, and cached per figure
             st.download_button(
-                "📥 Download Chart as HTML", html_bytes,
+                "📥 Download Chart as HTML", exporter(fig, "html"),
                 "chart.html", mime="text/html"
             )
+            if png_available():
+                st.download_button(
+                    "📷 Download Chart as PNG", exporter(fig, "png"),
+                    "chart.png", mime="image/png"
+                )
+            else:
+                st.caption("PNG export needs the `kaleido` package.")
 
-            # Download chart as PNG
-            img_bytes = fig.to_image(format='png')
-            st.download_button(
-                "📷 Download Chart as PNG", img_bytes,
-                "chart.png", mime="image/png"
-            )
+            # Collect charts for a single ZIP download
+            batch = st.session_state.setdefault("chart_batch", {})
+            if st.button("➕ Add Chart to Export Batch"):
+                batch[f"{len(batch) + 1:02d}_{chart_type.lower()}_{x_axis}"] = fig
+            if batch:
+                st.caption(f"{len(batch)} chart(s) in the export batch.")
+                zip_col, clear_col = st.columns(2)
+                with zip_col:
+                    st.download_button(
+                        "🗜️ Download Batch (ZIP)", lambda: export_zip(dict(batch)),
+                        "charts.zip", mime="application/zip"
+                    )
+                if clear_col.button("🧹 Clear Batch"):
+                    batch.clear()
+                    st.rerun(scope="fragment")
 
-            # Download underlying chart data as CSV
-            data = df[[x_axis] + y_axis].dropna()
-            csv_bytes = data.to_csv(index=False).encode()
+            # Download underlying chart data as CSV; written only when clicked
+            csv_bytes = lambda: df[[x_axis] + y_axis].dropna().to_csv(index=False).encode()
             st.download_button(
                 "📄 Download Chart Data (CSV)", csv_bytes,
                 "chart_data.csv", mime="text/csv"
             )
 
-            # Shareable data link (copy this link to share data)
-            b64 = base64.b64encode(csv_bytes).decode()
-            share_link = f"data:file/csv;base64,{b64}"
-            st.markdown(f"🔗 Share Chart Data Link: {share_link}")
+            # Shareable data link served from the artifact store (copy this link to share data)
+            if links_available():
+                links = st.session_state.setdefault("chart_share_links", {})
+                # Links belong to the data they were made from, including the X range
+                link_key = (dataset_key(source), chosen, chart_type, x_axis, tuple(y_axis), color_by)
+                if st.button("🔗 Create Share Link"):
+                    links[link_key] = share(csv_bytes(), "chart_data.csv", "text/csv")
+                if link_key in links:
+                    st.markdown(f"🔗 Share Chart Data Link: {links[link_key]}")
 
         except Exception as e:
             st.error(f"Error rendering chart: {e}")
@@ -88,26 +141,70 @@ def display_charts(df):
         st.info("Please select both X-axis and Y-axis for charting.")
 
 
-def create_figure(df, chart_type, x_axis, y_axis, color_by):
+def _range_bounds(stats):
+    """
+    Column min/max from the profile as plain Python values for a slider.
+    """
+    low, high = stats["min"], stats["max"]
+    if low is None or not low < high:
+        return None
+    if isinstance(low, pd.Timestamp):
+        return low.to_pydatetime(), high.to_pydatetime()
+    return low.item() if hasattr(low, "item") else low, high.item() if hasattr(high, "item") else high
+
+
+def _note_downsampled(fig, downsampled):
+    if downsampled:
+        fig.add_annotation(
+            text=f"Downsampled to {POINT_BUDGET:,} points per trace. Narrow the X-Axis Range for full detail.",
+            xref="paper", yref="paper", x=0, y=1.08, showarrow=False, font=dict(size=11)
+        )
+    return fig
+
+
+def create_figure(df, chart_type, x_axis, y_axis, color_by, renderer="Auto"):
     """
     Create a Plotly figure based on the specified chart type and axes.
+
+    ``renderer`` picks SVG or WebGL for point-heavy charts, see
+    ``chart_render.render_mode``.
     """
+    if chart_type in ('Bar', 'Pie', 'Treemap'):
+        # These charts only show sums per category, which a rollup cube can answer
+        dims = [x_axis] + ([color_by] if color_by and color_by != x_axis else [])
+        summed = aggregate(df, dims, y_axis)
+        if summed is not None:
+            df = summed
     df_clean = df.dropna(subset=[x_axis] + y_axis)
     melted = df_clean.melt(
         id_vars=[x_axis], value_vars=y_axis,
         var_name='Metric', value_name='Value'
     )
 
+    downsampled = False
+    if chart_type in ('Line', 'Area', 'Scatter'):
+        # Cap points per trace: LTTB keeps line shapes, min-max keeps scatter extremes
+        melted, downsampled = downsample_traces(
+            melted, x_axis, 'Value', color_by or 'Metric',
+            method='minmax' if chart_type == 'Scatter' else 'lttb'
+        )
+
     if chart_type == 'Line':
-        return px.line(melted, x=x_axis, y='Value', color=color_by or 'Metric')
+        return _note_downsampled(px.line(
+            melted, x=x_axis, y='Value', color=color_by or 'Metric',
+            render_mode=render_mode(len(melted), renderer)
+        ), downsampled)
     if chart_type == 'Bar':
         return px.bar(melted, x=x_axis, y='Value', color=color_by or 'Metric', barmode='group')
     if chart_type == 'Pie' and len(y_axis) == 1:
         return px.pie(df_clean, names=x_axis, values=y_axis[0], color=color_by)
     if chart_type == 'Area':
-        return px.area(melted, x=x_axis, y='Value', color=color_by or 'Metric')
+        return _note_downsampled(px.area(melted, x=x_axis, y='Value', color=color_by or 'Metric'), downsampled)
     if chart_type == 'Scatter':
-        return px.scatter(melted, x=x_axis, y='Value', color=color_by or 'Metric', size='Value')
+        return _note_downsampled(
+            px.scatter(melted, x=x_axis, y='Value', color=color_by or 'Metric', size='Value',
+                       render_mode=render_mode(len(melted), renderer)), downsampled
+        )
     if chart_type == 'Histogram':
         return px.histogram(df_clean, x=x_axis, y=y_axis[0])
     if chart_type == 'Treemap':
@@ -117,7 +214,8 @@ def create_figure(df, chart_type, x_axis, y_axis, color_by):
     if chart_type == 'Funnel':
         return px.funnel(df_clean, x=y_axis[0], y=x_axis)
     if chart_type == 'Bubble':
-        return px.scatter(df_clean, x=x_axis, y=y_axis[0], size=y_axis[0])
+        return px.scatter(df_clean, x=x_axis, y=y_axis[0], size=y_axis[0],
+                          render_mode=render_mode(len(df_clean), renderer))
     if chart_type == 'Candlestick':
         return go.Figure(data=[go.Candlestick(
             x=df_clean[x_axis],
@@ -125,10 +223,15 @@ def create_figure(df, chart_type, x_axis, y_axis, color_by):
             low=df_clean[y_axis[2]], close=df_clean[y_axis[3]]
         )])
     if chart_type == 'KPI':
+        # On large data the median and distinct count come from the load-time
+        # sketches (all non-missing values) instead of a pass over the column
+        median = quantiles(df, y_axis[0], [0.5])
+        distinct = distinct_count(df, y_axis[0])
         return go.Figure(go.Indicator(
             mode='number+delta',
             value=df_clean[y_axis[0]].mean(),
-            delta={'reference': df_clean[y_axis[0]].median()}
+            delta={'reference': df_clean[y_axis[0]].median() if median is None else median[0]},
+            title={'text': f"≈{distinct:,} distinct values" if distinct is not None else ""}
         ))
     if chart_type == 'Radar':
         fig = go.Figure()
@@ -143,7 +246,7 @@ def create_figure(df, chart_type, x_axis, y_axis, color_by):
         sorted_df['cum_perc'] = 100 * sorted_df['cum_sum'] / sorted_df[y_axis[0]].sum()
         fig = go.Figure()
         fig.add_trace(go.Bar(x=sorted_df[x_axis], y=sorted_df[y_axis[0]]))
-        fig.add_trace(go.Scatter(
+        fig.add_trace(scatter_trace(render_mode(len(sorted_df), renderer))(
             x=sorted_df[x_axis], y=sorted_df['cum_perc'], yaxis='y2',
             mode='lines+markers', name='Cumulative %'
         ))
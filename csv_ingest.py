@@ -0,0 +1,182 @@
+# DASHBOARD/csv_ingest.py
+
+import csv
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from DASHBOARD.type_inference import ChunkedInference
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Streaming ingestion needs pyarrow; callers fall back to eager reads
+    pa = None
+
+# Bytes handed to each parser block; blocks are parsed on pyarrow's thread pool
+BLOCK_SIZE = 16 * 1024**2
+# Raw chunks held in memory before later chunks are spilled to a temporary Parquet file
+MEMORY_BUDGET_BYTES = int(os.environ.get("DASHBOARD_INGEST_BUDGET_MB", "512")) * 1024**2
+
+# pandas' default NA markers, so both read paths agree on what is missing
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+
+def available():
+    """
+    True when the streaming reader can be used.
+    """
+    return pa is not None
+
+
+def read_csv_eager(source):
+    """
+    Read a CSV in one shot with every column as text.
+
+    Types are left to the inference engine so this path and
+    :func:`read_csv_chunked` produce identical frames.
+    """
+    return pd.read_csv(source, dtype=str, na_values=NA_VALUES, keep_default_na=False)
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    File wrapper that records how many bytes the parser has consumed.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def dedupe_names(row):
+    """
+    De-duplicate header names the way pandas does ("A", "A.1", ...).
+    """
+    names, seen = [], set()
+    for name in row:
+        candidate, count = name, 0
+        while candidate in seen:
+            count += 1
+            candidate = f"{name}.{count}"
+        seen.add(candidate)
+        names.append(candidate)
+    return names
+
+
+def _header(f):
+    """
+    Read the header row of a binary CSV stream.
+    """
+    line = f.readline()
+    while line and line.count(b'"') % 2:  # Quoted header spanning lines
+        line += f.readline()
+    return dedupe_names(next(csv.reader([line.decode("utf-8-sig")]), []))
+
+
+def read_csv_chunked(source, size=None, rename=None, progress=None,
+                     memory_budget=MEMORY_BUDGET_BYTES, block_size=BLOCK_SIZE):
+    """
+    Stream a CSV through pyarrow's multi-threaded parser, chunk by chunk.
+
+    Each raw chunk updates the column type plan; chunks beyond
+    ``memory_budget`` are spilled to a temporary Parquet file. Chunks are
+    then converted and downcast one at a time, giving the same frame as
+    ``preprocess_data(read_csv_eager(source))``.
+
+    Args:
+        source (str | file-like): Path or binary file object.
+        size (int): Total size in bytes, used for progress reporting.
+        rename (callable): Maps the header ``pd.Index`` to final column names.
+        progress (callable): Called as ``progress(fraction, text)``.
+        memory_budget (int): Raw bytes kept in memory before spilling.
+        block_size (int): Bytes per parser block.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: Typed dataframe and per-column inference report.
+    """
+    f = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    if size is None:
+        size = os.path.getsize(source) if f is not source else None
+    progress = progress or (lambda fraction, text: None)
+    spill_path, writer = None, None
+
+    try:
+        names = _header(f)
+        columns = pd.Index(rename(pd.Index(names)) if rename else names)
+        # Positional field names keep Arrow happy with duplicate headers
+        fields = [str(i) for i in range(len(names))]
+        counter = _CountingReader(f)
+        reader = pa_csv.open_csv(
+            counter,
+            read_options=pa_csv.ReadOptions(column_names=fields, block_size=block_size, use_threads=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={field: pa.string() for field in fields},
+                null_values=NA_VALUES,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True,
+            ),
+        )
+
+        inference = ChunkedInference(len(fields))
+        held, held_bytes, total_rows = [], 0, 0
+        for batch in reader:
+            total_rows += batch.num_rows
+            inference.observe(batch.to_pandas())
+            if writer is None and held_bytes + batch.nbytes <= memory_budget:
+                held.append(batch)
+                held_bytes += batch.nbytes
+            else:
+                if writer is None:
+                    fd, spill_path = tempfile.mkstemp(suffix=".parquet", prefix="dashboard-ingest-")
+                    os.close(fd)
+                    writer = pq.ParquetWriter(spill_path, batch.schema)
+                writer.write_batch(batch)
+            if size:
+                progress(min(counter.bytes_read / size, 1.0) * 0.5, "Parsing CSV...")
+
+        if writer is not None:
+            writer.close()
+        batches = _chain(held, pq.ParquetFile(spill_path).iter_batches() if spill_path else [])
+
+        frames, converted_rows = [], 0
+        for batch in batches:
+            frames.append(inference.convert(batch.to_pandas()))
+            converted_rows += batch.num_rows
+            progress(0.5 + 0.5 * converted_rows / max(total_rows, 1), "Converting columns...")
+
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.DataFrame({field: pd.Series(dtype=str) for field in fields})
+        df.columns = columns
+        return df, inference.report(df)
+
+    finally:
+        if writer is not None and writer.is_open:
+            writer.close()
+        if spill_path and os.path.exists(spill_path):
+            os.remove(spill_path)
+        if f is not source:
+            f.close()
+
+
+def _chain(held, spilled):
+    yield from held
+    yield from spilled
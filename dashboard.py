@@ -1,8 +1,27 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import sys
 import traceback
+from io import BytesIO
+
+from DASHBOARD.chart_render import render_mode
+from DASHBOARD.data_profile import columns_of, get_profile
+from DASHBOARD.dataset_cache import content_hash
+from DASHBOARD.dataset_registry import cached_dataset
+from DASHBOARD.excel_reader import list_sheets, read_sheet
+from DASHBOARD.pivot_engine import group_aggregate
+from DASHBOARD.rollup_cube import aggregate
+from DASHBOARD.sampling import overview_sample
+from DASHBOARD.sketches import five_numbers
+
+def _category_totals(df, category, value):
+    # Cube lookup first; otherwise a code groupby that goes parallel on large data
+    data = aggregate(df, [category], [value])
+    if data is None:
+        data = group_aggregate(df, [category], [value])
+    return data
 
 # File uploader and data loader
 def load_data():
@@ -14,15 +33,20 @@ def load_data():
             file_size = uploaded_file.size
             st.sidebar.caption(f"File size: {round(file_size / 1024**2, 2)} MB")
 
+            raw = uploaded_file.getvalue()
+            sheet_name = None
             if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
+                read = pd.read_csv
             elif uploaded_file.name.endswith('.xlsx'):
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
+                # Only the selected sheet is parsed
+                sheet_name = st.sidebar.selectbox("Select Sheet", list_sheets(raw))
+                read = lambda source: read_sheet(source, sheet_name)
             else:
                 st.sidebar.error("Unsupported file type.")
                 return None
 
-            return df
+            key = content_hash(raw, "dashboard.load_data", sheet_name)
+            return cached_dataset(key, lambda: read(BytesIO(raw)))
 
         except Exception as e:
             st.sidebar.error(f"Failed to load file: {str(e)}")
@@ -31,15 +55,18 @@ def load_data():
     return None
 
 # Plot Tree Map
-def plot_tree_map(df):
-    numeric_cols = df.select_dtypes(include='number').columns
-    categorical_cols = df.select_dtypes(include='object').columns
+def plot_tree_map(df, profile=None):
+    profile = profile or get_profile(df)
+    numeric_cols = columns_of(profile, "numeric")
+    categorical_cols = columns_of(profile, "text")
 
     # Check if there are valid numeric columns and categorical columns
     if len(numeric_cols) >= 1 and len(categorical_cols) >= 1:
         try:
-            # Use the first categorical column for path and first numeric column for values
-            fig = px.treemap(df, path=[categorical_cols[0]], values=numeric_cols[0])
+            # Use the first categorical column for path and first numeric column for values,
+            # summed over all rows so the figure holds one tile per category
+            data = _category_totals(df, categorical_cols[0], numeric_cols[0])
+            fig = px.treemap(data, path=[categorical_cols[0]], values=numeric_cols[0])
             st.plotly_chart(fig)
         except Exception as e:
             st.error(f"❌ Error creating Treemap: {str(e)}")
@@ -48,44 +75,73 @@ def plot_tree_map(df):
 
 
 # Plot Pie Chart
-def plot_pie_chart(df):
-    categorical_cols = df.select_dtypes(include='object').columns
-    numeric_cols = df.select_dtypes(include='number').columns
+def plot_pie_chart(df, profile=None):
+    profile = profile or get_profile(df)
+    categorical_cols = columns_of(profile, "text")
+    numeric_cols = columns_of(profile, "numeric")
     if len(categorical_cols) > 0 and len(numeric_cols) > 0:
-        data = df[[categorical_cols[0], numeric_cols[0]]].groupby(categorical_cols[0]).sum().reset_index()
+        data = _category_totals(df, categorical_cols[0], numeric_cols[0])
         fig = px.pie(data, names=categorical_cols[0], values=numeric_cols[0])
         st.plotly_chart(fig)
 
 # Plot Boxplot
-def plot_boxplot(df):
-    numeric_cols = df.select_dtypes(include='number').columns
+def plot_boxplot(df, profile=None, sample=None):
+    numeric_cols = columns_of(profile or get_profile(df), "numeric")
     if len(numeric_cols) >= 2:
-        fig = px.box(df, x=numeric_cols[0], y=numeric_cols[1])
+        # Large data: one box per group, drawn from precomputed quantile sketches
+        summary = five_numbers(df, numeric_cols[1])
+        if summary is not None:
+            st.plotly_chart(summary_boxplot(summary, numeric_cols[1]))
+            return
+        fig = px.box(df if sample is None else sample, x=numeric_cols[0], y=numeric_cols[1])
         st.plotly_chart(fig)
 
+def summary_boxplot(summary, column):
+    """
+    Box plot from five-number summaries instead of raw values.
+
+    Whiskers end at the usual 1.5 IQR fences, clipped to the min and max;
+    individual outliers are not drawn since the raw points are not used.
+    """
+    iqr = summary["q3"] - summary["q1"]
+    fig = go.Figure(go.Box(
+        x=summary.index.astype(str).tolist(), name=column,
+        q1=summary["q1"], median=summary["median"], q3=summary["q3"],
+        lowerfence=summary["q1"].sub(1.5 * iqr).clip(lower=summary["min"]),
+        upperfence=summary["q3"].add(1.5 * iqr).clip(upper=summary["max"]),
+    ))
+    fig.update_layout(xaxis_title=summary.index.name, yaxis_title=column)
+    return fig
+
 # Plot Scatter Plot
-def plot_scatter(df):
-    numeric_cols = df.select_dtypes(include='number').columns
+def plot_scatter(df, profile=None):
+    numeric_cols = columns_of(profile or get_profile(df), "numeric")
     if len(numeric_cols) >= 2:
-        fig = px.scatter(df, x=numeric_cols[0], y=numeric_cols[1], title="Scatter Plot")
+        fig = px.scatter(df, x=numeric_cols[0], y=numeric_cols[1], title="Scatter Plot",
+                         render_mode=render_mode(len(df)))
         st.plotly_chart(fig)
 
 # Pivot Table
-def show_pivot_table(df):
+def show_pivot_table(df, profile=None):
     try:
-        categorical_cols = df.select_dtypes(include='object').columns
-        numeric_cols = df.select_dtypes(include='number').columns
+        profile = profile or get_profile(df)
+        categorical_cols = columns_of(profile, "text")
+        numeric_cols = columns_of(profile, "numeric")
         if len(categorical_cols) > 0 and len(numeric_cols) > 0:
-            pivot_df = pd.pivot_table(df, index=categorical_cols[0], values=numeric_cols[0], aggfunc='sum')
-            st.dataframe(pivot_df)
+            pivot_df = _category_totals(df, categorical_cols[0], numeric_cols[0])
+            st.dataframe(pivot_df.set_index(categorical_cols[0]))
     except Exception:
         st.warning("⚠️ Pivot table could not be created due to memory constraints or incompatible columns.")
 
 # Show Column Info
-def show_column_info(df):
+def show_column_info(df, profile=None):
+    profile = profile or get_profile(df)
     st.subheader("🧾 Data Columns Info")
     st.write("Columns and their types:")
-    st.dataframe(pd.DataFrame({'Column': df.columns, 'Type': df.dtypes}))
+    st.dataframe(pd.DataFrame([
+        {'Column': name, 'Type': stats['dtype'], 'Distinct': stats['cardinality'], 'Nulls': stats['nulls']}
+        for name, stats in profile['columns'].items()
+    ]))
 
 # Main Dashboard
 def show_dashboard(df):
@@ -96,34 +152,29 @@ def show_dashboard(df):
         return
 
     try:
-        show_column_info(df)
+        profile = get_profile(df)
+        show_column_info(df, profile)
 
         st.subheader("🔍 Preview of Data")
         st.dataframe(df.head(10))
 
-        # Estimate memory usage
-        try:
-            df_memory = df.memory_usage(deep=True).sum()
-        except Exception:
-            df_memory = 0
-
-        threshold = 10 * 1024 * 1024  # 10 MB
-        large_data = df_memory > threshold or len(df) > 10000
+        # Aggregate charts always use every row; point-level charts get a
+        # sample sized to what the browser can draw
+        df_sample = overview_sample(df, profile)
+        if len(df_sample) < len(df):
+            st.info(
+                f"ℹ️ Large file detected. Pie, treemap and pivot use all {len(df):,} rows; "
+                f"scatter plots show a sample of {len(df_sample):,} rows."
+            )
 
         # Add a loading spinner for large files
-        if large_data:
-            st.warning("⚠️ Large file detected. Visualizations are based on a 50-row sample.")
-            df_sample = df.sample(n=50, random_state=1) if len(df) > 50 else df.copy()
-        else:
-            df_sample = df.copy()
-
         with st.spinner('Processing data for visualizations...'):
             # Show Charts & Pivot Table
-            plot_pie_chart(df_sample)
-            plot_scatter(df_sample)
-            plot_tree_map(df_sample)
-            plot_boxplot(df_sample)
-            show_pivot_table(df_sample)
+            plot_pie_chart(df, profile)
+            plot_scatter(df_sample, profile)
+            plot_tree_map(df, profile)
+            plot_boxplot(df, profile, sample=df_sample)
+            show_pivot_table(df, profile)
 
     except Exception:
         st.error("❌ Error displaying dashboard:")
@@ -1,52 +1,132 @@
 import pandas as pd
 import streamlit as st
 import os
+from functools import lru_cache
+from io import BytesIO
 
-@st.cache_data(ttl=600)
-def load_excel(file_path=None, uploaded_file=None):
+from DASHBOARD import csv_ingest, incremental
+from DASHBOARD.dataset_cache import content_hash
+from DASHBOARD.dataset_registry import cached_dataset
+from DASHBOARD.excel_reader import read_sheet
+from DASHBOARD.type_inference import infer_types
+
+# CSVs larger than this are streamed in chunks under a memory budget
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("DASHBOARD_STREAMING_THRESHOLD_MB", "100")) * 1024**2
+
+def load_excel(file_path=None, uploaded_file=None, sheet_name=None):
     """
     Load and clean Excel data from a local path or Streamlit upload.
 
     Args:
         file_path (str): Path to Excel file.
         uploaded_file (UploadedFile): File uploaded via Streamlit.
+        sheet_name (str): Workbook sheet to load; defaults to the first one.
+            Each sheet is parsed and cached independently.
 
     Returns:
-        pd.DataFrame: Cleaned and type-converted dataframe.
+        pd.DataFrame: Cleaned and type-converted dataframe. Results are cached
+        on disk by content hash, so re-uploads and restarts skip parsing, and
+        kept once in memory for all sessions (see ``dataset_registry``).
     """
     try:
         if uploaded_file is not None:
             # Check if the uploaded file is an Excel or CSV file
-            if uploaded_file.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
+            if uploaded_file.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" \
+                    or uploaded_file.name.endswith(".xls"):
                 # If it's an Excel file
-                df = pd.read_excel(uploaded_file, engine="openpyxl")
+                load = lambda source: preprocess_data(read_sheet(source, sheet_name or 0))
             elif uploaded_file.type == "text/csv":
                 # If it's a CSV file
-                df = pd.read_csv(uploaded_file)
+                load = lambda source: load_csv(source, uploaded_file.size)
             else:
                 st.error("Unsupported file type! Please upload an Excel or CSV file.")
                 return pd.DataFrame()
+            key = _upload_key(uploaded_file, sheet_name)
+            source = lambda: BytesIO(uploaded_file.getvalue())
 
         elif file_path and os.path.exists(file_path):
             # Load the file from the local path if specified
             if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                df = pd.read_excel(file_path, engine="openpyxl")
+                load = lambda source: preprocess_data(read_sheet(source, sheet_name or 0))
             elif file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                # Files that only grew have just their appended lines parsed
+                return incremental.load(
+                    os.path.abspath(file_path), os.path.getsize(file_path), incremental.file_reader(file_path),
+                    full=lambda: cached_dataset(
+                        _file_key(file_path, sheet_name),
+                        lambda: load_csv(file_path, os.path.getsize(file_path))
+                    ),
+                    parse=lambda data: load_csv(BytesIO(data), len(data)),
+                )
             else:
                 st.error("Unsupported file format. Please upload a CSV or Excel file.")
                 return pd.DataFrame()
+            key = _file_key(file_path, sheet_name)
+            source = lambda: file_path
 
         else:
             st.warning("Please provide a valid file.")
             return pd.DataFrame()
 
-        return preprocess_data(df)
+        # The file is only read on a cache miss
+        return cached_dataset(key, lambda: load(source()))
 
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return pd.DataFrame()
 
+def _upload_key(uploaded_file, sheet_name):
+    # Hashed once per upload rather than on every rerun
+    keys = st.session_state.setdefault("upload_keys", {})
+    upload = (uploaded_file.file_id, sheet_name)
+    if upload not in keys:
+        keys[upload] = content_hash(uploaded_file.getvalue(), "load_excel", sheet_name)
+    return keys[upload]
+
+@lru_cache(maxsize=64)
+def _path_key(path, size, mtime_ns, sheet_name):
+    return content_hash(path, "load_excel", sheet_name)
+
+def _file_key(file_path, sheet_name):
+    # Rehashed only when the file's size or modification time changes
+    stat = os.stat(file_path)
+    return _path_key(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, sheet_name)
+
+def load_csv(source, size):
+    """
+    Load and clean a CSV, streaming it in chunks when it is large.
+
+    Both paths read every column as text and run the same inference, so
+    they return identical dataframes.
+
+    Args:
+        source (str | file-like): Path or binary file object.
+        size (int): File size in bytes.
+
+    Returns:
+        pd.DataFrame: Cleaned and type-converted dataframe.
+    """
+    if size <= STREAMING_THRESHOLD_BYTES or not csv_ingest.available():
+        return preprocess_data(csv_ingest.read_csv_eager(source))
+
+    bar = st.sidebar.progress(0.0, text="Reading CSV...")
+    try:
+        df, report = csv_ingest.read_csv_chunked(
+            source, size=size, rename=clean_column_names,
+            progress=lambda fraction, text: bar.progress(fraction, text=text),
+        )
+    finally:
+        bar.empty()
+    df.attrs["inference_report"] = report
+    return df
+
+def clean_column_names(columns):
+    """
+    Strip column names and replace characters other than letters, digits and underscores.
+    """
+    columns = columns.str.strip()
+    return columns.str.replace('[^a-zA-Z0-9_ ]', '', regex=True).str.replace(" ", "_")
+
 def preprocess_data(df):
     """
     Automatically detect and convert data types in the dataframe.
@@ -55,29 +135,16 @@ def preprocess_data(df):
         df (pd.DataFrame): Raw dataframe.
 
     Returns:
-        pd.DataFrame: Cleaned dataframe with inferred types.
+        pd.DataFrame: Cleaned dataframe with inferred types. The per-column
+        inference report is stored in ``df.attrs["inference_report"]``.
     """
     try:
         # Strip column names
-        df.columns = df.columns.str.strip()
-        df.columns = df.columns.str.replace('[^a-zA-Z0-9_ ]', '', regex=True).str.replace(" ", "_")
-
-        for col in df.columns:
-            # Try to convert to datetime
-            if df[col].dtype == object:
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='raise')
-                except:
-                    pass
-
-            # Try to convert to numeric
-            try:
-                df[col] = pd.to_numeric(df[col], errors='ignore')
-            except:
-                pass
-
-        # Fill NaNs for consistency
-        df.fillna("-", inplace=True)
+        df.columns = clean_column_names(df.columns)
+
+        # Single-pass type inference; gaps stay as NA so dtypes are preserved
+        df, report = infer_types(df)
+        df.attrs["inference_report"] = report
 
         return df
 
@@ -0,0 +1,170 @@
+# DASHBOARD/data_profile.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from DASHBOARD.dataset_cache import dataset_key, load_sidecar, store_sidecar
+from DASHBOARD.memory_cache import BoundedCache
+
+# Columns with more distinct values than this keep only their cardinality
+MAX_DISTINCT = int(os.environ.get("DASHBOARD_PROFILE_MAX_DISTINCT", "200000"))
+PROFILE_CACHE_BYTES = int(os.environ.get("DASHBOARD_PROFILE_CACHE_MB", "256")) * 1024**2
+
+_profiles = BoundedCache(PROFILE_CACHE_BYTES)
+
+
+def column_kind(series):
+    """
+    Classify a column as integer, float, boolean, datetime or text.
+    """
+    dtype = series.dtype
+    if dtype == bool or isinstance(dtype, pd.BooleanDtype):
+        return "boolean"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "integer"
+    if pd.api.types.is_float_dtype(dtype):
+        return "float"
+    return "text"
+
+
+def _profile_column(series, counts=None, memory_bytes=None):
+    if counts is None:
+        counts = series.value_counts(sort=False, dropna=True)
+    try:
+        counts = counts.sort_index()
+    except TypeError:  # Mixed types that cannot be ordered
+        pass
+    cardinality = len(counts)
+    keep = cardinality <= MAX_DISTINCT
+    values = counts.index
+
+    low = high = None
+    if cardinality and counts.index.is_monotonic_increasing:
+        low, high = values[0], values[-1]
+
+    return {
+        "dtype": str(series.dtype),
+        "kind": column_kind(series),
+        "nulls": int(len(series) - counts.sum()),
+        "cardinality": cardinality,
+        "values": values if keep else None,
+        "counts": counts.to_numpy(dtype=np.int64) if keep else None,
+        "min": low,
+        "max": high,
+        "memory_bytes": int(series.memory_usage(deep=True, index=False)) if memory_bytes is None else memory_bytes,
+    }
+
+
+def profile_dataset(df):
+    """
+    Compute the column statistics every module reads.
+
+    Args:
+        df (pd.DataFrame): Loaded dataset.
+
+    Returns:
+        dict: ``rows``, ``memory_bytes`` and per-column stats under
+        ``columns``: dtype, kind, nulls, cardinality, sorted distinct
+        ``values`` with their ``counts``, min/max and memory.
+    """
+    columns = {name: _profile_column(df[name]) for name in df.columns.unique()}
+    return {
+        "rows": len(df),
+        "memory_bytes": sum(stats["memory_bytes"] for stats in columns.values()) + int(df.index.memory_usage()),
+        "columns": columns,
+    }
+
+
+def get_profile(df):
+    """
+    Profile of a dataset, computed once and cached in memory and on disk.
+
+    Args:
+        df (pd.DataFrame): Loaded dataset.
+
+    Returns:
+        dict: See :func:`profile_dataset`.
+    """
+    key = dataset_key(df)
+    profile = _profiles.get(key)
+    if profile is None:
+        # Only frames backed by the dataset cache get a sidecar on disk
+        on_disk = key == df.attrs.get("content_hash")
+        profile = load_sidecar(key, "profile") if on_disk else None
+        if profile is None:
+            profile = profile_dataset(df)
+            if on_disk:
+                store_sidecar(key, "profile", profile)
+        _profiles.put(key, profile)
+    return profile
+
+
+def extend_profile(df, previous, start):
+    """
+    Profile of ``df``, which is ``previous`` with rows appended from
+    position ``start``, derived from the profile of ``previous``.
+
+    Value counts and sizes of the new rows are merged into the existing
+    stats; only columns whose dtype changed or whose values were not kept
+    are profiled again in full.
+
+    Returns:
+        dict: See :func:`profile_dataset`.
+    """
+    key = dataset_key(previous)
+    old = _profiles.get(key)
+    if old is None and key == previous.attrs.get("content_hash"):
+        old = load_sidecar(key, "profile")
+    if old is None:
+        return get_profile(df)
+
+    delta = df.iloc[start:]
+    columns = {}
+    for name in df.columns.unique():
+        stats = old["columns"].get(name)
+        series = df[name]
+        if stats is None or stats["values"] is None or stats["dtype"] != str(series.dtype):
+            columns[name] = _profile_column(series)
+            continue
+        part = _profile_column(delta[name])
+        if part["values"] is None:
+            columns[name] = _profile_column(series)
+            continue
+        counts = pd.Series(stats["counts"], index=stats["values"]).add(
+            pd.Series(part["counts"], index=part["values"]), fill_value=0
+        ).astype(np.int64)
+        columns[name] = _profile_column(series, counts, stats["memory_bytes"] + part["memory_bytes"])
+
+    profile = {
+        "rows": len(df),
+        "memory_bytes": sum(stats["memory_bytes"] for stats in columns.values()) + int(df.index.memory_usage()),
+        "columns": columns,
+    }
+    key = dataset_key(df)
+    if key == df.attrs.get("content_hash"):
+        store_sidecar(key, "profile", profile)
+    return _profiles.put(key, profile)
+
+
+def columns_of(profile, *kinds):
+    """
+    Column names of the given kinds, in dataset order.
+
+    ``"numeric"`` is shorthand for integer and float columns.
+    """
+    wanted = set(kinds)
+    if "numeric" in wanted:
+        wanted |= {"integer", "float"}
+    return [name for name, stats in profile["columns"].items() if stats["kind"] in wanted]
+
+
+def distinct_values(profile, column):
+    """
+    Sorted distinct values of a column, or None if it exceeds ``MAX_DISTINCT``.
+    """
+    values = profile["columns"][column]["values"]
+    return None if values is None else values.tolist()
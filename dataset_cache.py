@@ -0,0 +1,227 @@
+# DASHBOARD/dataset_cache.py
+
+import hashlib
+import os
+import pickle
+import uuid
+import weakref
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:  # Cache is disabled without pyarrow
+    pyarrow = None
+
+CACHE_DIR = os.environ.get(
+    "DASHBOARD_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "dashboard", "datasets"),
+)
+# Total disk budget for cached datasets; least recently used files go first
+CACHE_BUDGET_BYTES = int(os.environ.get("DASHBOARD_CACHE_BUDGET_MB", "2048")) * 1024**2
+# Bump whenever preprocess_data output changes so stale entries are ignored
+CACHE_VERSION = "2"
+
+_CHUNK_SIZE = 8 * 1024**2
+
+
+def content_hash(source, *parts):
+    """
+    Hash raw dataset bytes together with any loader parameters.
+
+    Args:
+        source (bytes | str): Raw bytes, or a path hashed in chunks.
+        *parts: Extra values (loader name, sheet name, ...) mixed into the key.
+
+    Returns:
+        str: Hex digest used as the cache key.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    for part in (CACHE_VERSION,) + parts:
+        digest.update(b"\0" + str(part).encode())
+    return digest.hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.parquet")
+
+
+def is_cached(key):
+    """
+    Whether a dataset is stored on disk under ``key``.
+    """
+    return os.path.exists(_path(key))
+
+
+def load_cached(key):
+    """
+    Load a cached dataset memory-mapped, or return None on a miss.
+    """
+    path = _path(key)
+    if pyarrow is None or not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path, engine="pyarrow", memory_map=True)
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except Exception:
+        return None
+    _tag(df, key)
+    return df
+
+
+def store(key, df):
+    """
+    Write a dataset to the cache and evict old entries beyond the budget.
+
+    Returns:
+        bool: True if the dataset was cached.
+    """
+    if pyarrow is None:
+        return False
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_path(key)}.{uuid.uuid4().hex}.tmp"
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, _path(key))
+    except Exception:
+        # Mixed-type object columns cannot be written; just skip caching
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    evict()
+    return True
+
+
+def _sidecar_path(key, name):
+    return os.path.join(CACHE_DIR, f"{key}.{name}.pkl")
+
+
+def store_sidecar(key, name, value):
+    """
+    Persist a derived object (profile, cube, ...) next to a cached dataset.
+
+    Sidecars are evicted together with their dataset.
+
+    Returns:
+        bool: True if the object was written.
+    """
+    if not os.path.exists(_path(key)):
+        return False
+    tmp_path = f"{_sidecar_path(key, name)}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _sidecar_path(key, name))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    evict()
+    return True
+
+
+def load_sidecar(key, name):
+    """
+    Load an object stored with :func:`store_sidecar`, or None on a miss.
+    """
+    try:
+        with open(_sidecar_path(key, name), "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def evict(budget=None):
+    """
+    Delete least recently used datasets until the cache fits the budget.
+    """
+    budget = CACHE_BUDGET_BYTES if budget is None else budget
+    if not os.path.isdir(CACHE_DIR):
+        return
+    # Group each dataset with its sidecars; recency comes from the Parquet file
+    entries = {}
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".tmp"):
+            continue
+        key = name.split(".", 1)[0]
+        stat = os.stat(os.path.join(CACHE_DIR, name))
+        files, size, mtime = entries.get(key, ([], 0, 0))
+        if name.endswith(".parquet"):
+            mtime = stat.st_mtime
+        entries[key] = (files + [name], size + stat.st_size, mtime)
+
+    total = sum(size for _, size, _ in entries.values())
+    for files, size, _ in sorted(entries.values(), key=lambda entry: entry[2]):
+        if total <= budget:
+            break
+        for name in files:
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
+        total -= size
+
+
+def cached_dataset(key, build):
+    """
+    Return the dataset cached under ``key``, building and storing it on a miss.
+
+    Args:
+        key (str): Key from :func:`content_hash`.
+        build (callable): Zero-argument function returning the dataframe.
+
+    Returns:
+        pd.DataFrame: Dataset with ``attrs["content_hash"]`` set to ``key``
+        and ``attrs["content_rows"]`` to its row count.
+    """
+    df = load_cached(key)
+    if df is not None:
+        return df
+    df = build()
+    if df is not None and not df.empty:
+        store(key, df)
+        _tag(df, key)
+    return df
+
+
+def _tag(df, key):
+    df.attrs["content_hash"] = key
+    df.attrs["content_rows"] = len(df)
+
+
+_fingerprints = {}
+
+
+def dataset_key(df):
+    """
+    Stable identity of a dataset for per-dataset caches.
+
+    Frames returned by :func:`cached_dataset` are identified by their content
+    hash. pandas copies ``attrs`` onto derived frames, so the hash is only
+    trusted while the frame still has its original rows; anything else is
+    fingerprinted by hashing its contents (memoized per object).
+
+    Returns:
+        str: Hex digest identifying the frame's contents.
+    """
+    key = df.attrs.get("content_hash")
+    index = df.index
+    if key and df.attrs.get("content_rows") == len(df) and isinstance(index, pd.RangeIndex) \
+            and index.start == 0 and index.step == 1:
+        return key
+
+    entry = _fingerprints.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df).to_numpy().tobytes())
+    digest.update(repr((list(df.columns), list(df.dtypes.astype(str)))).encode())
+    frame_id = id(df)
+    ref = weakref.ref(df, lambda _: _fingerprints.pop(frame_id, None))
+    _fingerprints[frame_id] = (ref, digest.hexdigest())
+    return digest.hexdigest()
@@ -0,0 +1,158 @@
+# DASHBOARD/dataset_registry.py
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import streamlit as st
+
+from DASHBOARD import dataset_cache
+from DASHBOARD.memory_cache import sizeof
+
+# Memory for parsed datasets shared by all sessions; unreferenced ones are
+# dropped (they stay in the on-disk cache) once the total exceeds it
+REGISTRY_BUDGET_BYTES = int(os.environ.get("DASHBOARD_REGISTRY_MB", "1024")) * 1024**2
+
+_SESSION_KEY = "dataset_handles"
+
+# Content hash -> [dataframe, bytes, session references], least recently used first
+_entries = OrderedDict()
+_lock = threading.RLock()
+_nbytes = 0
+
+
+def _is_registrable(df):
+    key = df.attrs.get("content_hash")
+    return bool(key) and df.attrs.get("content_rows") == len(df)
+
+
+def register(df):
+    """
+    Shared instance of a loaded dataset.
+
+    Returns the frame already registered under ``df``'s content hash if
+    there is one, so identical data loaded by several sessions is kept once.
+    Frames without a content hash (see ``dataset_cache.cached_dataset``)
+    are returned unchanged.
+    """
+    if df is None or not _is_registrable(df):
+        return df
+    return _register(df, 0)
+
+
+def _register(df, refs):
+    global _nbytes
+    key = df.attrs["content_hash"]
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _entries[key] = [df, sizeof(df), 0]
+            _nbytes += entry[1]
+        _entries.move_to_end(key)
+        # References are taken before the budget check so a held dataset is never dropped
+        entry[2] += refs
+        _enforce_budget()
+        return entry[0]
+
+
+def lookup(key):
+    """
+    Dataset registered under ``key``, read from the on-disk cache if it is
+    not in memory, or None on a miss.
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            return entry[0]
+    return register(dataset_cache.load_cached(key))
+
+
+def cached_dataset(key, build):
+    """
+    :func:`dataset_cache.cached_dataset` behind the in-memory registry.
+    """
+    df = lookup(key)
+    if df is None:
+        df = register(dataset_cache.cached_dataset(key, build))
+    return df
+
+
+def _enforce_budget():
+    # Only datasets no session holds can be freed; they are written to disk first
+    global _nbytes
+    for key in list(_entries):
+        if _nbytes <= REGISTRY_BUDGET_BYTES:
+            break
+        df, size, refs = _entries[key]
+        if refs:
+            continue
+        if not dataset_cache.is_cached(key):
+            dataset_cache.store(key, df)
+        del _entries[key]
+        _nbytes -= size
+
+
+def _release(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            entry[2] -= 1
+            if not entry[2]:
+                _enforce_budget()
+
+
+class DatasetHandle:
+    """
+    A session's reference to a registered dataset.
+
+    ``frame`` is a shallow copy of the shared dataframe: it has its own
+    column labels and attrs but shares the column data, which copy-on-write
+    keeps read-only for the session. The reference is dropped when the
+    handle is garbage collected (for example when the session ends) or
+    :meth:`release` is called.
+    """
+
+    def __init__(self, df):
+        self.key = df.attrs["content_hash"]
+        self.frame = _register(df, 1).copy(deep=False)
+        self._finalizer = weakref.finalize(self, _release, self.key)
+
+    def release(self):
+        self._finalizer()
+
+
+def hold(df, slot="dataset"):
+    """
+    Keep the current session's reference to ``df``, releasing the dataset
+    previously held in ``slot`` (also when ``df`` is empty or None).
+
+    Returns:
+        pd.DataFrame: The session's read-only frame of the shared dataset,
+        or ``df`` itself if it has no content hash.
+    """
+    key = df.attrs["content_hash"] if df is not None and _is_registrable(df) else None
+    handles = st.session_state.setdefault(_SESSION_KEY, {})
+    handle = handles.get(slot)
+    if handle is not None and handle.key != key:
+        handle.release()
+        del handles[slot]
+        handle = None
+    if key is None:
+        return df
+    if handle is None:
+        handle = handles[slot] = DatasetHandle(df)
+    return handle.frame
+
+
+def stats():
+    """
+    Registry usage: datasets in memory, their bytes and session references.
+    """
+    with _lock:
+        return {
+            "datasets": len(_entries),
+            "bytes": _nbytes,
+            "references": sum(entry[2] for entry in _entries.values()),
+        }
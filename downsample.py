@@ -0,0 +1,125 @@
+# DASHBOARD/downsample.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Points kept per chart trace; the browser stays responsive well below this
+POINT_BUDGET = int(os.environ.get("DASHBOARD_CHART_POINTS", "4000"))
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets point selection for line-like series.
+
+    The first and last points are kept. Every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves the visual shape.
+
+    Args:
+        x (np.ndarray): Sorted x values (numeric or datetime).
+        y (np.ndarray): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        following = slice(stop, edges[bucket + 2] if bucket + 2 < len(edges) else n)
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        area = np.abs(
+            (x[anchor] - avg_x) * (y[start:stop] - y[anchor])
+            - (x[anchor] - x[start:stop]) * (avg_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        kept[bucket + 1] = anchor
+    return kept
+
+
+def minmax(y, buckets):
+    """
+    Min-max bucketing: keep the lowest and highest point of each bucket.
+
+    Args:
+        y (np.ndarray): y values, ordered by x.
+        buckets (int): Number of equal-count buckets.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points (at most
+        ``2 * buckets + 2``), always including the first and last point.
+    """
+    n = len(y)
+    if 2 * buckets >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # Within each bucket the sort puts the minimum first and the maximum last
+    order = np.lexsort((_as_float(y), bucket))
+    return np.unique(np.concatenate([order[edges[:-1]], order[edges[1:] - 1], [0, n - 1]]))
+
+
+def can_downsample(series):
+    """
+    Whether a column can serve as a sortable x axis for downsampling.
+    """
+    return pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype)
+
+
+def downsample_traces(frame, x, y, trace, method="lttb", budget=POINT_BUDGET):
+    """
+    Cap the points of every trace of a long-format chart frame.
+
+    Args:
+        frame (pd.DataFrame): One row per point.
+        x (str): X column; must be numeric or datetime.
+        y (str): Y column.
+        trace (str): Column that splits points into traces (plotly ``color``).
+        method (str): ``"lttb"`` for lines/areas, ``"minmax"`` for scatter.
+        budget (int): Maximum points per trace.
+
+    Returns:
+        tuple[pd.DataFrame, bool]: Reduced frame (sorted by x within each
+        trace) and whether any trace was reduced.
+    """
+    if not can_downsample(frame[x]):
+        return frame, False
+    if trace in frame:
+        groups = frame.groupby(trace, sort=False, dropna=False).indices
+    else:
+        groups = {None: np.arange(len(frame))}
+    if all(len(rows) <= budget for rows in groups.values()):
+        return frame, False
+
+    kept = []
+    x_values, y_values = frame[x], frame[y].to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(x_values.dtype):
+        x_values = x_values.to_numpy(dtype="datetime64[ns]")  # Timezone-aware values are compared in UTC
+    else:
+        x_values = x_values.to_numpy()
+    for rows in groups.values():
+        rows = rows[np.argsort(x_values[rows], kind="stable")]
+        if len(rows) > budget:
+            if method == "minmax":
+                picked = minmax(y_values[rows], max(1, (budget - 2) // 2))
+            else:
+                picked = lttb(x_values[rows], y_values[rows], budget)
+            rows = rows[picked]
+        kept.append(rows)
+    return frame.iloc[np.concatenate(kept)], True
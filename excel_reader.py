@@ -0,0 +1,152 @@
+# DASHBOARD/excel_reader.py
+
+import importlib.util
+import sys
+import time
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+
+import pandas as pd
+
+from DASHBOARD.csv_ingest import dedupe_names
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _as_file(source):
+    """
+    Return a fresh readable object for a path, raw bytes or an upload.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def list_sheets(source):
+    """
+    List the sheet names of a workbook without parsing any sheet.
+
+    For .xlsx files only ``xl/workbook.xml`` is read from the zip archive;
+    other formats fall back to ``pd.ExcelFile``.
+
+    Args:
+        source (str | bytes | file-like): Workbook path, bytes or upload.
+
+    Returns:
+        list[str]: Sheet names in workbook order.
+    """
+    f = _as_file(source)
+    if zipfile.is_zipfile(f):
+        with zipfile.ZipFile(_as_file(source)) as archive:
+            with archive.open("xl/workbook.xml") as workbook:
+                return [
+                    element.get("name")
+                    for _, element in ElementTree.iterparse(workbook)
+                    if element.tag == f"{_MAIN_NS}sheet"
+                ]
+    engine = "calamine" if "calamine" in available_backends() else None
+    with pd.ExcelFile(_as_file(source), engine=engine) as workbook:
+        return list(workbook.sheet_names)
+
+
+def _read_calamine(source, sheet_name):
+    return pd.read_excel(_as_file(source), sheet_name=sheet_name, engine="calamine")
+
+
+def _read_openpyxl(source, sheet_name):
+    return pd.read_excel(_as_file(source), sheet_name=sheet_name, engine="openpyxl")
+
+
+def _read_openpyxl_streaming(source, sheet_name):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(_as_file(source), read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, ())
+        data = list(rows)
+    finally:
+        workbook.close()
+
+    # Read-only sheets can report trailing rows that hold no values
+    while data and all(value is None for value in data[-1]):
+        data.pop()
+    names = dedupe_names([
+        f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)
+    ])
+    return pd.DataFrame.from_records(data, columns=names) if data else pd.DataFrame(columns=names)
+
+
+# Backends in order of preference; each reads one sheet into a raw dataframe
+BACKENDS = {
+    "calamine": _read_calamine,
+    "openpyxl-streaming": _read_openpyxl_streaming,
+    "openpyxl": _read_openpyxl,
+}
+
+_REQUIREMENTS = {
+    "calamine": "python_calamine",
+    "openpyxl-streaming": "openpyxl",
+    "openpyxl": "openpyxl",
+}
+
+
+def available_backends():
+    """
+    Names of the backends whose libraries are installed, fastest first.
+    """
+    return [name for name, module in _REQUIREMENTS.items() if importlib.util.find_spec(module)]
+
+
+def read_sheet(source, sheet_name=0, backend=None):
+    """
+    Parse a single sheet of a workbook.
+
+    Args:
+        source (str | bytes | file-like): Workbook path, bytes or upload.
+        sheet_name (str | int): Sheet to read; defaults to the first one.
+        backend (str): One of ``BACKENDS``; the fastest available is used if omitted.
+
+    Returns:
+        pd.DataFrame: Raw (not yet preprocessed) sheet contents.
+    """
+    backend = backend or available_backends()[0]
+    if isinstance(sheet_name, int) and backend == "openpyxl-streaming":
+        sheet_name = list_sheets(source)[sheet_name]
+    return BACKENDS[backend](source, sheet_name)
+
+
+def benchmark(source, sheet_name=0, repeat=3):
+    """
+    Time every available backend on the same sheet.
+
+    Returns:
+        dict: Backend name mapped to the best of ``repeat`` runs, in seconds.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+
+    timings = {}
+    start = time.perf_counter()
+    list_sheets(source)
+    timings["list_sheets"] = time.perf_counter() - start
+    for backend in available_backends():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            read_sheet(source, sheet_name, backend)
+            runs.append(time.perf_counter() - start)
+        timings[backend] = min(runs)
+    return timings
+
+
+# Usage: python -m DASHBOARD.excel_reader workbook.xlsx [sheet]
+if __name__ == "__main__":
+    path = sys.argv[1]
+    sheet = sys.argv[2] if len(sys.argv) > 2 else 0
+    for name, seconds in benchmark(path, sheet).items():
+        print(f"{name:<20} {seconds:8.3f} s")
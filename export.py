@@ -0,0 +1,264 @@
+# DASHBOARD/export.py
+
+import importlib.util
+import io
+import os
+import tempfile
+import zlib
+
+import pandas as pd
+
+# Rows serialized at a time; memory use is bounded by one chunk
+CHUNK_ROWS = int(os.environ.get("DASHBOARD_EXPORT_CHUNK_ROWS", "100000"))
+# Finished downloads up to this size stay in memory, larger ones go to a temporary file
+SPOOL_BYTES = int(os.environ.get("DASHBOARD_EXPORT_SPOOL_MB", "16")) * 1024**2
+FORMATS = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "csv.zst": "application/zstd",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+LABELS = {
+    "csv": "CSV",
+    "csv.gz": "CSV (gzip)",
+    "csv.zst": "CSV (zstd)",
+    "parquet": "Parquet",
+    "xlsx": "Excel (XLSX)",
+}
+# Optional package each format needs
+_REQUIRES = {"csv.zst": "zstandard", "parquet": "pyarrow", "xlsx": "openpyxl"}
+# Excel sheet limits
+_MAX_SHEET_ROWS = 1_048_576
+_MAX_SHEET_NAME = 31
+
+_FILE_CHUNK = 1024**2
+
+
+def formats():
+    """
+    Export formats whose optional package is installed.
+    """
+    return [
+        fmt for fmt in FORMATS
+        if fmt not in _REQUIRES or importlib.util.find_spec(_REQUIRES[fmt]) is not None
+    ]
+
+
+def filename(stem, fmt):
+    """
+    Download file name for an export, e.g. ``raw_data.csv.gz``.
+    """
+    return f"{stem}.{fmt}"
+
+
+def _chunks(frame, chunk_rows):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def _flat(frame, index):
+    """
+    Frame with the index as leading columns and one header row, for formats
+    without a notion of row labels or multi-level headers.
+    """
+    if index:
+        frame = frame.reset_index(allow_duplicates=True)
+    if isinstance(frame.columns, pd.MultiIndex):
+        frame = frame.set_axis(
+            [" / ".join(str(level) for level in column if str(level)) for column in frame.columns],
+            axis=1,
+        )
+    return frame
+
+
+def csv_chunks(frame, index=False, chunk_rows=CHUNK_ROWS):
+    """
+    Encoded CSV of a frame, ``chunk_rows`` rows at a time.
+    """
+    for start, chunk in _chunks(frame, chunk_rows):
+        yield chunk.to_csv(index=index, header=start == 0).encode()
+
+
+def _compress(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _read_back(file):
+    file.seek(0)
+    yield from iter(lambda: file.read(_FILE_CHUNK), b"")
+
+
+def _parquet_chunks(frame, index, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    frame = _flat(frame, index)
+    with tempfile.TemporaryFile() as file:
+        writer = None
+        for _, chunk in _chunks(frame, chunk_rows):
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # Columns that are all missing in the first chunk are typed as text
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(file, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        writer.close()
+        yield from _read_back(file)
+
+
+def _rows(chunk):
+    """
+    Cell values of a chunk as plain Python rows, with missing values blank.
+    """
+    for column, dtype in chunk.dtypes.items():
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            # Excel has no timezones; keep the wall-clock time
+            chunk = chunk.assign(**{column: chunk[column].dt.tz_localize(None)})
+    cells = chunk.astype(object)
+    return cells.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def _sheet_name(name, taken):
+    name = "".join("_" if c in "[]:*?/\\" else c for c in str(name))[:_MAX_SHEET_NAME] or "Sheet"
+    candidate, n = name, 2
+    while candidate.lower() in taken:
+        suffix = f" ({n})"
+        candidate, n = name[:_MAX_SHEET_NAME - len(suffix)] + suffix, n + 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def _xlsx_chunks(sheets, chunk_rows):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to temporary files instead of keeping cells
+    workbook = Workbook(write_only=True)
+    taken = set()
+    for name, (frame, index) in sheets.items():
+        frame = _flat(frame, index)
+        header = [str(column) for column in frame.columns]
+        # Frames longer than one sheet continue on further sheets
+        for start in range(0, max(len(frame), 1), _MAX_SHEET_ROWS - 1):
+            sheet = workbook.create_sheet(_sheet_name(name, taken))
+            sheet.append(header)
+            part = frame.iloc[start:start + _MAX_SHEET_ROWS - 1]
+            for _, chunk in _chunks(part, chunk_rows):
+                for row in _rows(chunk):
+                    sheet.append(row)
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        yield from _read_back(file)
+
+
+def stream(frame, fmt, index=False, chunk_rows=CHUNK_ROWS):
+    """
+    Export a frame as a stream of byte chunks.
+
+    CSV output is produced and compressed incrementally; Parquet and XLSX
+    are written chunk by chunk to a temporary file and read back, so the
+    whole encoded file is never held in memory.
+
+    Args:
+        frame (pd.DataFrame): Data to export.
+        fmt (str): One of ``FORMATS``.
+        index (bool): Include the index (e.g. the row labels of a pivot).
+        chunk_rows (int): Rows serialized at a time.
+
+    Returns:
+        Iterator[bytes]: The encoded file.
+    """
+    if fmt == "csv":
+        return csv_chunks(frame, index, chunk_rows)
+    if fmt == "csv.gz":
+        return _compress(csv_chunks(frame, index, chunk_rows), zlib.compressobj(6, zlib.DEFLATED, 31))
+    if fmt == "csv.zst":
+        import zstandard
+
+        return _compress(csv_chunks(frame, index, chunk_rows), zstandard.ZstdCompressor(level=3).compressobj())
+    if fmt == "parquet":
+        return _parquet_chunks(frame, index, chunk_rows)
+    if fmt == "xlsx":
+        return _xlsx_chunks({"Data": (frame, index)}, chunk_rows)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def workbook(sheets, chunk_rows=CHUNK_ROWS):
+    """
+    Export several frames as one XLSX workbook, one sheet per frame.
+
+    Args:
+        sheets (dict[str, tuple[pd.DataFrame, bool]]): ``(frame, index)``
+            by sheet name; ``index`` includes the frame's row labels.
+
+    Returns:
+        Iterator[bytes]: The encoded workbook.
+    """
+    return _xlsx_chunks(sheets, chunk_rows)
+
+
+class _SpooledReader(io.RawIOBase):
+    # Raw reader over a spooled file: st.download_button accepts RawIOBase
+    # objects, but not SpooledTemporaryFile itself
+
+    def __init__(self, file):
+        self._file = file
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def readinto(self, buffer):
+        data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def spool(chunks):
+    """
+    Write chunks to a ``SpooledTemporaryFile`` and return it rewound, ready
+    for ``st.download_button``.
+
+    Only the finished file is held, in memory up to ``SPOOL_BYTES`` and on
+    disk beyond, instead of the chunks plus their joined copy.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    for chunk in chunks:
+        file.write(chunk)
+    file.seek(0)
+    return _SpooledReader(file)
+
+
+def exporter(build, fmt, index=False):
+    """
+    Zero-argument callable for ``st.download_button``.
+
+    Streamlit only calls it when the button is clicked, so neither the
+    data (``build()``) nor the file is produced on other reruns.
+    """
+    return lambda: spool(stream(build(), fmt, index))
+
+
+def workbook_exporter(build):
+    """
+    Like :func:`exporter`, for a workbook whose sheets are returned by ``build()``.
+    """
+    return lambda: spool(workbook(build()))
@@ -0,0 +1,198 @@
+# DASHBOARD/filter_engine.py
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from DASHBOARD.dataset_cache import dataset_key
+from DASHBOARD.memory_cache import BoundedCache
+from DASHBOARD.text_index import TrigramIndex
+
+# Shared budget for cached column codes and per-condition row bitmaps
+MASK_CACHE_BYTES = int(os.environ.get("DASHBOARD_MASK_CACHE_MB", "256")) * 1024**2
+
+_cache = BoundedCache(MASK_CACHE_BYTES)
+
+
+def column_codes(series):
+    """
+    Dictionary-encode a column.
+
+    Args:
+        series (pd.Series): Column to encode.
+
+    Returns:
+        tuple[np.ndarray, pd.Index]: Integer code per row (-1 for missing)
+        and the sorted distinct values the codes point into.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    try:
+        codes, dictionary = pd.factorize(series, sort=True)
+    except TypeError:  # Mixed types that cannot be ordered
+        codes, dictionary = pd.factorize(series)
+    return codes, pd.Index(dictionary)
+
+
+def cached_codes(df, column):
+    """
+    :func:`column_codes` memoized per dataset and column.
+    """
+    key = ("codes", dataset_key(df), column)
+    entry = _cache.get(key)
+    if entry is None:
+        codes, dictionary = column_codes(df[column])
+        # Codes index the dictionary, so int32 is always wide enough
+        entry = _cache.put(key, (codes.astype(np.int32, copy=False), dictionary))
+    return entry
+
+
+def expand_hits(codes, hits):
+    """
+    Expand a per-dictionary-entry boolean table into a per-code mask.
+    """
+    # The extra trailing slot is what missing values (code -1) index into
+    table = np.zeros(len(hits) + 1, dtype=bool)
+    table[:-1] = hits
+    return table[codes]
+
+
+def condition_hits(dictionary, condition):
+    """
+    Evaluate one filter condition against a column's distinct values.
+
+    Args:
+        dictionary (pd.Index): Distinct values of the column.
+        condition (dict): ``{"in": values}``, or ``{"codes": bits}`` with a
+            ``np.packbits`` bitset holding one bit per dictionary entry.
+
+    Returns:
+        np.ndarray: One boolean per dictionary entry.
+    """
+    if "in" in condition:
+        positions = dictionary.get_indexer(pd.Index(list(condition["in"])).unique())
+        hits = np.zeros(len(dictionary), dtype=bool)
+        hits[positions[positions >= 0]] = True
+        return hits
+    if "codes" in condition:
+        return np.unpackbits(condition["codes"], count=len(dictionary)).astype(bool)
+    raise ValueError(f"Unsupported filter condition: {condition}")
+
+
+def text_index(df, column):
+    """
+    Trigram index over a column's distinct values, built on first use.
+    """
+    key = ("text_index", dataset_key(df), column)
+    index = _cache.get(key)
+    if index is None:
+        _, dictionary = cached_codes(df, column)
+        index = _cache.put(key, TrigramIndex(dictionary))
+    return index
+
+
+def _condition_key(condition):
+    if "in" in condition:
+        return ("in", frozenset(condition["in"]))
+    if "codes" in condition:
+        # Selection bitsets are edited in place, so key on their content
+        return ("codes", hashlib.blake2b(condition["codes"].tobytes(), digest_size=16).digest())
+    return ("contains", condition["contains"].lower())
+
+
+def spec_key(spec):
+    """
+    Hashable identity of a filter spec, for keying results derived from it.
+    """
+    key = []
+    for condition in spec:
+        columns = condition["column"]
+        key.append((tuple(columns) if isinstance(columns, list) else columns, _condition_key(condition)))
+    return tuple(key)
+
+
+def value_hits(df, column, condition):
+    """
+    Evaluate a condition against one column's distinct values.
+
+    Returns:
+        np.ndarray: One boolean per entry of the column's dictionary.
+    """
+    if "contains" in condition:
+        return text_index(df, column).search(condition["contains"])
+    return condition_hits(cached_codes(df, column)[1], condition)
+
+
+def _column_bits(df, column, condition):
+    codes, _ = cached_codes(df, column)
+    return np.packbits(expand_hits(codes, value_hits(df, column, condition)))
+
+
+def condition_bits(df, condition):
+    """
+    Row bitmap (``np.packbits`` layout) for one condition.
+
+    Bitmaps are cached per (dataset, column, condition), so when a single
+    selection changes only that column's bitmap is recomputed. A
+    ``contains`` condition may name a list of columns; rows matching in
+    any of them are kept.
+    """
+    columns = condition["column"]
+    key = ("bits", dataset_key(df)) + spec_key([condition])[0]
+    bits = _cache.get(key)
+    if bits is None:
+        if isinstance(columns, list):
+            bits = np.zeros((len(df) + 7) // 8, dtype=np.uint8)
+            for column in columns:
+                bits |= _column_bits(df, column, condition)
+        else:
+            bits = _column_bits(df, columns, condition)
+        _cache.put(key, bits)
+    return bits
+
+
+def build_mask(df, spec):
+    """
+    Turn a declarative filter spec into a single boolean row mask.
+
+    Each condition is evaluated once per distinct value (substring search
+    goes through a trigram index), expanded to rows through the column's
+    integer codes and cached as a bitmap; the bitmaps are AND-ed together
+    eight rows at a time.
+
+    Args:
+        df (pd.DataFrame): Data to filter.
+        spec (list[dict]): Conditions such as
+            ``{"column": "FC", "in": ["BLR", "DEL"]}`` or
+            ``{"column": "FC", "codes": bits}`` or
+            ``{"column": "CITY", "contains": "pun"}`` or
+            ``{"column": ["CITY", "ZONE"], "contains": "pun"}``.
+
+    Returns:
+        np.ndarray | None: Row mask, or None when the spec has no conditions.
+    """
+    bits = None
+    for condition in spec:
+        rows = condition_bits(df, condition)
+        bits = rows if bits is None else bits & rows
+    return None if bits is None else np.unpackbits(bits, count=len(df)).astype(bool)
+
+
+def apply_spec(df, spec, as_index=False):
+    """
+    Filter a dataframe with a spec, materializing the result only once.
+
+    Args:
+        df (pd.DataFrame): Data to filter.
+        spec (list[dict]): Filter spec, see :func:`build_mask`.
+        as_index (bool): Return matching row positions instead of a dataframe.
+
+    Returns:
+        pd.DataFrame | np.ndarray: Filtered rows, or their positions.
+    """
+    mask = build_mask(df, spec)
+    if as_index:
+        return np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+    return df if mask is None else df[mask]
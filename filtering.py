@@ -3,7 +3,13 @@
 import streamlit as st
 import pandas as pd
 import io
-import base64
+
+from DASHBOARD.artifact_store import links_available, share
+from DASHBOARD.data_profile import columns_of, distinct_values, get_profile
+from DASHBOARD.export import FORMATS, exporter, filename, stream
+from DASHBOARD.filter_engine import cached_codes, text_index
+from DASHBOARD.pipeline import filtered
+from DASHBOARD.value_picker import value_picker
 
 def apply_filters(df):
     st.markdown("## 🔍 Advanced Data Filtering")
@@ -19,41 +25,86 @@ def apply_filters(df):
     """, unsafe_allow_html=True)
 
     filter_container = st.container()
-    filtered_df = df.copy()
+    profile = get_profile(df)
+    # Conditions are collected first and applied as one mask at the end
+    spec = []
 
     with filter_container:
         cols = df.columns.tolist()
         selected_cols = st.multiselect("Select columns to filter", cols, default=[])
 
         for col in selected_cols:
-            unique_vals = df[col].dropna().unique().tolist()
-            if len(unique_vals) <= 100:
+            unique_vals = distinct_values(profile, col)
+            if unique_vals is not None and len(unique_vals) <= 100:
                 options = st.multiselect(f"Filter `{col}`", unique_vals, default=unique_vals, key=f"filter_{col}")
-                filtered_df = filtered_df[filtered_df[col].isin(options)]
+                spec.append({"column": col, "in": options})
+            else:
+                # Too many values for a multiselect; page through them instead
+                _, dictionary = cached_codes(df, col)
+                stats = profile["columns"][col]
+                counts = stats["counts"] if stats["values"] is not None else None
+                # Trigram index only for text, built on the first search rather than on render
+                search = None
+                if stats["kind"] == "text":
+                    search = lambda query, col=col: text_index(df, col).search(query)
+                selected = value_picker(
+                    col, dictionary, key=col, group="filter_pickers",
+                    search=search, counts=counts
+                )
+                spec.append({"column": col, "codes": selected})
 
         # Search functionality (for all text columns)
         with st.expander("🔎 Text Search"):
-            search_col = st.selectbox("Column to search", df.select_dtypes(include='object').columns.tolist(), key="search_col")
-            query = st.text_input("Search term (case-insensitive)", key="search_term")
-            if query:
-                filtered_df = filtered_df[filtered_df[search_col].str.contains(query, case=False, na=False)]
+            text_cols = columns_of(profile, "text")
+            if not text_cols:
+                # An empty column list would match no rows
+                st.caption("This dataset has no text columns to search.")
+            else:
+                search_all = st.checkbox("Search all text columns", key="search_all")
+                search_col = st.selectbox("Column to search", text_cols, key="search_col", disabled=search_all)
+                query = st.text_input("Search term (case-insensitive)", key="search_term")
+                # Answered from a trigram index built once per column
+                if query and (search_all or search_col):
+                    spec.append({"column": text_cols if search_all else search_col, "contains": query})
 
         # Reset button
         if st.button("🔄 Reset Filters"):
             st.experimental_rerun()
 
+    # Kept so the Downloads section can rebuild the filtered data on request
+    st.session_state.filter_spec = spec
+    filtered_df = filtered(df, spec)
+
     st.markdown("---")
     st.success(f"Filtered rows: {len(filtered_df)} / {len(df)}")
 
     return filtered_df
 
-def download_data(df, filename="filtered_data.csv"):
+@st.fragment
+def filtering_section(df):
+    """
+    Filter widgets and the rows they keep.
+
+    Runs as a fragment, so a filter change reruns only this section
+    instead of the whole app from the data input down.
+    """
+    filtered_df = apply_filters(df)
+    st.dataframe(filtered_df, use_container_width=True)
+
+def download_data(df, stem="filtered_data", fmt="csv"):
     """
     Creates a download link for a dataframe.
+
+    The file is streamed in chunks into the artifact store and linked,
+    instead of being inlined into the page as a data URI. Without a
+    configured artifact server it is offered through Streamlit instead.
     """
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # encode to base64
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">📥 Download CSV</a>'
+    name = filename(stem, fmt)
+    if not links_available():
+        st.download_button(f"📥 Download {fmt.upper()}", exporter(lambda: df, fmt), name, FORMATS[fmt])
+        return
+    url = share(stream(df, fmt), name, FORMATS[fmt])
+    href = f'<a href="{url}" download="{name}">📥 Download {fmt.upper()}</a>'
     st.markdown(href, unsafe_allow_html=True)
 
 def share_file_button(uploaded_file):
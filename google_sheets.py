@@ -2,8 +2,18 @@
 
 import pandas as pd
 import streamlit as st
+from io import BytesIO
 from urllib.parse import urlparse, parse_qs
 
+from DASHBOARD import incremental
+from DASHBOARD.dataset_cache import content_hash
+from DASHBOARD.dataset_registry import cached_dataset, lookup
+from DASHBOARD.sheets_fetcher import export_url, fetch, fetch_all, tab_names
+from DASHBOARD.type_inference import infer_types
+
+# Option of the sheet picker that stacks every tab into one dataset
+ALL_TABS = "All tabs (combined)"
+
 @st.cache_data(ttl=600)
 def extract_sheet_id(google_sheet_url):
     """
@@ -22,29 +32,71 @@ def extract_sheet_id(google_sheet_url):
 def get_sheet_names(sheet_id):
     """
     Fetch the names of sheets available in the spreadsheet.
-    Requires gspread and Google API for full auth. For public sheets, defaults to Sheet1.
+    Read from the public workbook page; falls back to Sheet1 if none are listed.
     """
     try:
-        # For public sheets we can only assume 'Sheet1' unless using API
-        return ["Sheet1"]
+        return tab_names(sheet_id) or ["Sheet1"]
     except Exception as e:
         st.error(f"Unable to get sheet names: {e}")
-        return []
+        return ["Sheet1"]
 
-@st.cache_data(ttl=600)
+def _load_tabs(sheet_id, sheet_names):
+    """
+    Download tabs concurrently and parse the ones not cached yet.
+
+    Unchanged tabs (304 response or same content hash) are served from the
+    dataset cache without parsing.
+    """
+    urls = [export_url(sheet_id, name) for name in sheet_names]
+    frames = []
+    for url, (key, raw) in zip(urls, fetch_all(urls, "load_google_sheet")):
+        df = None
+        if raw is None:
+            df = lookup(key)
+            if df is None:  # A tab extended by an append is cached under its chained key
+                df = incremental.current(url, key)
+        if df is None:
+            if raw is None:  # Unchanged, but no longer cached
+                key, raw = fetch(url, "load_google_sheet", conditional=False)
+            # Tabs that only gained rows at the bottom have just those rows parsed
+            df = incremental.load(
+                url, len(raw), incremental.bytes_reader(raw),
+                full=lambda key=key, raw=raw: cached_dataset(key, lambda: preprocess_data(pd.read_csv(BytesIO(raw)))),
+                parse=lambda data: preprocess_data(pd.read_csv(BytesIO(data))), source_key=key,
+            )
+        frames.append(df)
+    return frames
+
+# Cached as shared objects: the frames live once in the dataset registry
+@st.cache_resource(ttl=600)
 def load_google_sheet(sheet_id, sheet_name="Sheet1"):
     """
     Load a single Google Sheet as DataFrame.
+    Parsed results are cached on disk by a hash of the downloaded CSV.
     """
     try:
-        # Construct export CSV URL
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
-        df = pd.read_csv(csv_url)
-        return preprocess_data(df)
+        return _load_tabs(sheet_id, [sheet_name])[0]
     except Exception as e:
         st.error(f"Failed to load Google Sheet: {e}")
         return pd.DataFrame()
 
+@st.cache_resource(ttl=600)
+def load_google_sheets(sheet_id, sheet_names):
+    """
+    Load several tabs concurrently as one DataFrame, with a SHEET column
+    naming each row's tab.
+    """
+    try:
+        frames = _load_tabs(sheet_id, list(sheet_names))
+        # The combined frame is cached under the keys of its tabs
+        key = content_hash("|".join(df.attrs["content_hash"] for df in frames).encode(), "load_google_sheets")
+        return cached_dataset(key, lambda: pd.concat(
+            [df.assign(SHEET=name) for name, df in zip(sheet_names, frames)], ignore_index=True
+        ))
+    except Exception as e:
+        st.error(f"Failed to load Google Sheets: {e}")
+        return pd.DataFrame()
+
 def preprocess_data(df):
     """
     Automatically clean and infer column types.
@@ -52,19 +104,8 @@ def preprocess_data(df):
     try:
         df.columns = df.columns.str.strip().str.replace('[^a-zA-Z0-9_ ]', '', regex=True).str.replace(" ", "_")
 
-        for col in df.columns:
-            if df[col].dtype == object:
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='raise')
-                except:
-                    pass
-
-            try:
-                df[col] = pd.to_numeric(df[col], errors='ignore')
-            except:
-                pass
-
-        df.fillna("-", inplace=True)
+        df, report = infer_types(df)
+        df.attrs["inference_report"] = report
         return df
 
     except Exception as e:
@@ -0,0 +1,205 @@
+# DASHBOARD/incremental.py
+
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from DASHBOARD.data_profile import column_kind, extend_profile
+from DASHBOARD.dataset_cache import content_hash
+from DASHBOARD.dataset_registry import cached_dataset, lookup
+from DASHBOARD.rollup_cube import extend_cubes
+from DASHBOARD.sketches import extend_sketches
+
+INCREMENTAL = os.environ.get("DASHBOARD_INCREMENTAL", "1") != "0"
+# Bytes before the previous end of a source that must be unchanged for an append
+TAIL_BYTES = 64 * 1024
+_HEADER_BYTES = 64 * 1024
+
+# Last load of each source: dataset key, bytes consumed, tail digest, header
+# line and the content key of the raw source, if the caller has one
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def file_reader(path):
+    """
+    ``read(start, stop)`` over a file's bytes.
+    """
+    def read(start, stop):
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(stop - start)
+    return read
+
+
+def bytes_reader(raw):
+    """
+    ``read(start, stop)`` over bytes already in memory.
+    """
+    return lambda start, stop: raw[start:stop]
+
+
+def _tail_digest(read, size):
+    return hashlib.sha256(read(max(0, size - TAIL_BYTES), size)).hexdigest()
+
+
+def appended_bytes(state, size, read):
+    """
+    Complete lines appended to a source since ``state`` was recorded.
+
+    The source counts as appended to only if it grew, its previous content
+    ended with a newline and the last ``TAIL_BYTES`` before the previous end
+    are unchanged. A trailing line without its newline yet is left for the
+    next refresh.
+
+    Returns:
+        bytes | None: The new lines (possibly empty), or None if the source
+        was rewritten rather than appended to.
+    """
+    end = state["size"]
+    if size < end or read(end - 1, end) != b"\n" or _tail_digest(read, end) != state["tail"]:
+        return None
+    new = read(end, size)
+    return new[:new.rfind(b"\n") + 1]
+
+
+def _remember(source, df, size, read, source_key=None):
+    head = read(0, min(size, _HEADER_BYTES))
+    if b"\n" not in head or not df.attrs.get("content_hash"):
+        return
+    with _sources_lock:
+        _sources[source] = {
+            "key": df.attrs["content_hash"],
+            "size": size,
+            "tail": _tail_digest(read, size),
+            "header": head[:head.index(b"\n") + 1],
+            "source_key": source_key,
+        }
+
+
+def current(source, source_key):
+    """
+    Dataset of the last load of ``source``, if that load was of the raw
+    content keyed ``source_key``.
+
+    Datasets extended by an append are cached under a chained key rather
+    than the content key of the raw source, so callers that only know the
+    latter (e.g. after a 304 response) find them here.
+
+    Returns:
+        pd.DataFrame | None: The dataset, or None if unknown or not cached.
+    """
+    with _sources_lock:
+        state = _sources.get(source)
+    if state is None or source_key is None or state["source_key"] != source_key:
+        return None
+    return lookup(state["key"])
+
+
+def _family(series):
+    # Integer and float columns concatenate to float, as a full load would type them
+    kind = column_kind(series)
+    return "numeric" if kind in ("integer", "float") else kind
+
+
+def _nullable(dtype):
+    # Blank values need the masked counterpart of numpy integer and bool dtypes,
+    # which is also how a full load types such a column
+    if dtype.kind in "iu":
+        return f"{'U' if dtype.kind == 'u' else ''}Int{dtype.itemsize * 8}"
+    if dtype.kind == "b":
+        return "boolean"
+    return dtype
+
+
+def _conform(previous, delta):
+    """
+    ``delta`` with ``previous``'s columns and compatible types, or None if
+    the new rows would change how a column is typed.
+    """
+    if list(delta.columns) != list(previous.columns):
+        return None
+    for name in previous.columns:
+        if delta[name].isna().all():
+            delta[name] = delta[name].astype(_nullable(previous[name].dtype))
+        elif _family(delta[name]) != _family(previous[name]):
+            return None
+    return delta
+
+
+def append(previous, delta, start_key):
+    """
+    Append parsed rows to a cached dataset and carry its precomputed
+    profile, rollup cubes and sketches over to the result.
+
+    Args:
+        previous (pd.DataFrame): Cached dataset.
+        delta (pd.DataFrame): Parsed new rows.
+        start_key (str): Digest of the raw appended bytes, chained into the
+            new dataset key.
+
+    Returns:
+        pd.DataFrame | None: The combined dataset, or None if the new rows
+        do not fit the existing column types.
+    """
+    delta = _conform(previous, delta)
+    if delta is None:
+        return None
+    start = len(previous)
+    key = content_hash(f"{previous.attrs['content_hash']}+{start_key}".encode(), "append")
+    report = previous.attrs.get("inference_report")
+    df = cached_dataset(key, lambda: pd.concat([previous, delta], ignore_index=True))
+    if report is not None:
+        df.attrs["inference_report"] = report
+    # Aggregates are extended with the new rows instead of rebuilt
+    extend_profile(df, previous, start)
+    extend_cubes(df, previous, start)
+    extend_sketches(df, previous, start)
+    return df
+
+
+def load(source, size, read, full, parse, source_key=None):
+    """
+    Load a source, parsing only appended rows when it merely grew.
+
+    A source with the same size and tail as last time is served from the
+    cache, including datasets assembled from earlier appends.
+
+    Args:
+        source (str): Identity of the source (path or URL).
+        size (int): Current size of the source in bytes.
+        read (callable): ``read(start, stop)`` returning the source's bytes.
+        full (callable): Zero-argument loader of the whole source.
+        parse (callable): Parser of raw CSV bytes (header line included)
+            into a typed frame, as ``full`` would produce it.
+        source_key (str): Content key of the source's current bytes, if
+            known; recorded for :func:`current`.
+
+    Returns:
+        pd.DataFrame: The dataset. If parsing or appending the new rows
+        fails, the whole source is loaded again.
+    """
+    with _sources_lock:
+        state = _sources.get(source)
+    if INCREMENTAL and state is not None and size >= state["size"]:
+        previous = lookup(state["key"])
+        new = appended_bytes(state, size, read) if previous is not None else None
+        if new == b"":
+            return previous
+        if new is not None:
+            try:
+                df = append(previous, parse(state["header"] + new), hashlib.sha256(new).hexdigest())
+            except Exception:
+                df = None  # Fall back to a full load rather than losing the dataset
+            if df is not None:
+                with _sources_lock:
+                    _sources[source] = dict(state, key=df.attrs["content_hash"], size=state["size"] + len(new),
+                                            tail=_tail_digest(read, state["size"] + len(new)), source_key=source_key)
+                return df
+
+    df = full()
+    if INCREMENTAL and df is not None and not df.empty:
+        _remember(source, df, size, read, source_key)
+    return df
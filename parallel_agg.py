@@ -0,0 +1,124 @@
+# DASHBOARD/parallel_agg.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Below this many rows the pool overhead outweighs the gain
+PARALLEL_MIN_ROWS = int(os.environ.get("DASHBOARD_PARALLEL_MIN_ROWS", "2000000"))
+MAX_WORKERS = int(os.environ.get("DASHBOARD_PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+# Partitions per worker; more than one evens out uneven partitions
+PARTITIONS_PER_WORKER = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shareable(array):
+    """
+    Whether an array can be placed in shared memory as-is.
+    """
+    return isinstance(array, np.ndarray) and array.dtype.kind in "biuf"
+
+
+def should_parallelize(n_rows, arrays=()):
+    """
+    Whether a job over ``n_rows`` rows of ``arrays`` goes to the process pool.
+    """
+    return (
+        MAX_WORKERS > 1
+        and n_rows >= PARALLEL_MIN_ROWS
+        and all(shareable(array) for array in arrays)
+    )
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a multi-threaded Streamlit server is unsafe; start clean workers
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _discard_pool(pool):
+    # A worker died (OOM, kill): the pool is unusable, so the next job starts a fresh one
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_partition(func, blocks, start, stop, kwargs):
+    handles = {}
+    try:
+        views = {}
+        for name, (block, dtype, length) in blocks.items():
+            handles[name] = shared_memory.SharedMemory(name=block)
+            views[name] = np.ndarray(length, dtype=dtype, buffer=handles[name].buf)[start:stop]
+        return func(views, start, **kwargs)
+    finally:
+        views = None
+        for handle in handles.values():
+            handle.close()
+
+
+def run_partitioned(func, arrays, workers=None, **kwargs):
+    """
+    Run ``func`` over row partitions of ``arrays`` in a process pool.
+
+    The arrays are copied once into shared memory; every worker maps the
+    same blocks and only slices out its own row range, so no row data is
+    pickled. ``func`` must be a module-level function taking
+    ``(arrays, start, **kwargs)``, where ``arrays`` holds the partition's
+    slices and ``start`` its first row, and should return a small partial
+    result (e.g. per-group aggregate states) for the caller to merge.
+
+    Args:
+        func (callable): Partition function.
+        arrays (dict[str, np.ndarray]): Equal-length numeric arrays.
+        workers (int): Pool size to plan partitions for; defaults to
+            ``MAX_WORKERS``.
+        **kwargs: Passed through to ``func``.
+
+    Returns:
+        list: ``func`` results in row order. If the pool breaks, the job is
+        rerun in this process as a single partition.
+    """
+    n_rows = len(next(iter(arrays.values())))
+    parts = max(1, (workers or MAX_WORKERS) * PARTITIONS_PER_WORKER)
+    bounds = np.linspace(0, n_rows, parts + 1, dtype=np.int64)
+
+    segments = []
+    try:
+        blocks = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            segments.append(segment)
+            np.ndarray(len(array), dtype=array.dtype, buffer=segment.buf)[:] = array
+            blocks[name] = (segment.name, array.dtype.str, len(array))
+
+        pool = _get_pool()
+        try:
+            futures = [
+                pool.submit(_run_partition, func, blocks, int(start), int(stop), kwargs)
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+            ]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            _discard_pool(pool)
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    # Serial fallback after a broken pool: one partition covering every row
+    return [func({name: np.ascontiguousarray(array) for name, array in arrays.items()}, 0, **kwargs)]
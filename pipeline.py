@@ -0,0 +1,129 @@
+# DASHBOARD/pipeline.py
+
+import os
+
+import numpy as np
+
+from DASHBOARD.dataset_cache import dataset_key
+from DASHBOARD.filter_engine import apply_spec, spec_key
+from DASHBOARD.memory_cache import BoundedCache, sizeof
+
+STAGE_CACHE_BYTES = int(os.environ.get("DASHBOARD_STAGE_CACHE_MB", "256")) * 1024**2
+
+# Upstream stages of each stage. A stage's cache key holds the dataset key
+# plus its own and its upstream stages' inputs (see stage_key), so a change
+# anywhere up the chain misses every stage below it and leaves the others
+# cached. Load and profile depend on the dataset alone. Exports are built
+# from the filter and pivot results per download click and are not cached.
+STAGES = {
+    "load": (),
+    "profile": ("load",),
+    "filter": ("profile",),
+    "pivot": ("filter",),
+    "chart": ("profile",),
+}
+
+_results = BoundedCache(STAGE_CACHE_BYTES)
+_MISSING = object()
+
+
+def lineage(stage):
+    """
+    ``stage`` and every stage upstream of it, upstream first.
+    """
+    if stage not in STAGES:
+        raise KeyError(f"Unknown pipeline stage: {stage}")
+    order = []
+    for parent in STAGES[stage]:
+        order += [name for name in lineage(parent) if name not in order]
+    return tuple(order) + (stage,)
+
+
+def stage_key(stage, df, inputs):
+    """
+    Cache key of a stage's result: the dataset key plus the inputs of the
+    stage and of each stage in its :func:`lineage`.
+
+    Args:
+        stage (str): Name in ``STAGES``.
+        df (pd.DataFrame): Loaded dataset the stage works on.
+        inputs (dict): Hashable inputs by stage name. Stages without an
+            entry have no inputs besides the dataset.
+
+    Raises:
+        KeyError: If ``inputs`` names a stage outside the lineage.
+    """
+    names = lineage(stage)
+    unknown = set(inputs) - set(names)
+    if unknown:
+        raise KeyError(f"Inputs of {sorted(unknown)} do not feed the {stage} stage")
+    return (stage, dataset_key(df)) + tuple(inputs.get(name) for name in names)
+
+
+def run_stage(stage, df, inputs, build, size=None):
+    """
+    Result of a pipeline stage, cached under :func:`stage_key`.
+
+    Args:
+        stage (str): Name in ``STAGES``.
+        df (pd.DataFrame): Loaded dataset the stage works on.
+        inputs (dict): Hashable inputs by stage name, see :func:`stage_key`.
+        build (callable): Zero-argument function computing the result.
+        size (callable): Optional byte size estimate of a result, for
+            values :func:`memory_cache.sizeof` cannot measure.
+
+    Returns:
+        object: The stage's result.
+    """
+    key = stage_key(stage, df, inputs)
+    result = _results.get(key, _MISSING)
+    if result is _MISSING:
+        result = build()
+        result = _results.put(key, result, None if size is None else size(result))
+    return result
+
+
+def filter_rows(df, spec):
+    """
+    Filter stage: positions of the rows a spec keeps.
+
+    Returns:
+        np.ndarray | None: Sorted row positions (int32 when they fit), or None
+        when the spec keeps every row.
+    """
+    if not spec:
+        return None
+
+    def build():
+        rows = apply_spec(df, spec, as_index=True)
+        if len(rows) == len(df):
+            return None
+        return rows.astype(np.int32) if len(df) < 2**31 else rows
+
+    return run_stage("filter", df, {"filter": spec_key(spec)}, build)
+
+
+def filtered(df, spec):
+    """
+    Filter stage materialized as a dataframe, cached like :func:`filter_rows`.
+
+    The copy lives in the process-wide stage cache, shared by every session
+    with the same dataset and filters and bounded by
+    ``DASHBOARD_STAGE_CACHE_MB``. Sessions do not keep their own.
+    """
+    rows = filter_rows(df, spec)
+    if rows is None:
+        return df
+    return run_stage("filter", df, {"filter": ("frame", spec_key(spec))}, lambda: df.take(rows))
+
+
+def figure_size(fig):
+    """
+    Approximate bytes held by a Plotly figure's trace data.
+    """
+    return sum(
+        sizeof(value)
+        for trace in fig.data
+        for value in trace.to_plotly_json().values()
+        if isinstance(value, (np.ndarray, list, tuple))
+    )
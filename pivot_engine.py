@@ -0,0 +1,334 @@
+# DASHBOARD/pivot_engine.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from DASHBOARD.filter_engine import cached_codes, spec_key
+from DASHBOARD.memory_cache import BoundedCache
+from DASHBOARD.parallel_agg import run_partitioned, should_parallelize
+from DASHBOARD.pipeline import filter_rows, stage_key
+
+AGGREGATIONS = ["sum", "mean", "count", "min", "max", "first", "last"]
+MARGIN_LABEL = "All"
+PIVOT_CACHE_BYTES = int(os.environ.get("DASHBOARD_PIVOT_CACHE_MB", "128")) * 1024**2
+
+# Mergeable states behind each aggregation; first/last are kept as row positions
+_STATES = {
+    "sum": ["sum"],
+    "mean": ["sum", "count"],
+    "count": ["count"],
+    "min": ["min"],
+    "max": ["max"],
+    "first": ["first"],
+    "last": ["last"],
+}
+# How partial states of the same kind combine
+_MERGE = {"sum": "sum", "count": "sum", "min": "min", "max": "max", "first": "min", "last": "max"}
+# Aggregation applied to each source column to produce a state
+_VALUE_STATES = {"sum": "sum", "count": "count", "min": "min", "max": "max"}
+_POSITION_STATES = {"first": "min", "last": "max"}
+
+_results = BoundedCache(PIVOT_CACHE_BYTES)
+
+
+def states_for(aggfuncs):
+    """
+    Mergeable states needed to answer the given aggregations.
+    """
+    return [state for state in _MERGE if any(state in _STATES[agg] for agg in aggfuncs)]
+
+
+def group_states(keys, columns, positions, states, keep_missing=False):
+    """
+    Per-group mergeable states of already gathered arrays.
+
+    Args:
+        keys (dict[str, np.ndarray]): Dictionary codes per dimension.
+        columns (dict[str, pd.Series | np.ndarray]): Values to aggregate.
+        positions (np.ndarray): Dataset row position of every entry.
+        states (list[str]): States to keep, see :func:`states_for`.
+        keep_missing (bool): Keep groups with a missing key (code -1).
+
+    Returns:
+        pd.DataFrame: See :func:`base_states`.
+    """
+    values = list(columns)
+    # Like pd.pivot_table, rows with a missing key are left out
+    valid = np.ones(len(positions), dtype=bool)
+    if not keep_missing:
+        for codes in keys.values():
+            valid &= codes >= 0
+
+    frame = {}
+    plan = {}
+    for i, column in enumerate(columns.values()):
+        funcs = [func for state, func in _VALUE_STATES.items() if state in states]
+        if funcs:
+            frame[f"v{i}"] = column
+            plan[f"v{i}"] = funcs
+        funcs = [func for state, func in _POSITION_STATES.items() if state in states]
+        if funcs:
+            # Row position of every non-null value; first/last merge as min/max
+            frame[f"p{i}"] = np.where(pd.notna(column), positions, np.nan)
+            plan[f"p{i}"] = funcs
+    frame = pd.DataFrame(frame)[valid]
+
+    if keys:
+        group_keys = [codes[valid] for codes in keys.values()]
+        result = frame.groupby(group_keys, sort=True).agg(plan)
+        result.index.names = list(keys)
+    else:
+        result = frame.agg(plan).unstack().to_frame().T
+
+    labels = {"v": {func: state for state, func in _VALUE_STATES.items()},
+              "p": {func: state for state, func in _POSITION_STATES.items()}}
+    result.columns = pd.MultiIndex.from_tuples(
+        [(values[int(name[1:])], labels[name[0]][func]) for name, func in result.columns]
+    )
+    return result
+
+
+def _partition_states(arrays, start, dims, values, states, keep_missing):
+    # Runs in a worker process on one row range of the shared arrays
+    keys = {dim: arrays[f"key:{dim}"] for dim in dims}
+    columns = {value: arrays[f"value:{value}"] for value in values}
+    return group_states(keys, columns, arrays["positions"], states, keep_missing)
+
+
+def base_states(df, dims, values, states, rows=None, keep_missing=False):
+    """
+    Per-group mergeable states, in one grouped pass over the data.
+
+    Large jobs over numeric columns are split into row partitions that are
+    aggregated in a process pool and merged with :func:`rollup`.
+
+    Args:
+        df (pd.DataFrame): Full dataset.
+        dims (list[str]): Grouping columns; groups are keyed by their codes.
+        values (list[str]): Columns to aggregate.
+        states (list[str]): States to keep, see :func:`states_for`.
+        rows (np.ndarray): Row positions to aggregate, or None for all rows.
+        keep_missing (bool): Keep groups with a missing key (code -1)
+            instead of dropping them like ``pd.pivot_table``.
+
+    Returns:
+        pd.DataFrame: One row per group present in the data, indexed by the
+        dims' dictionary codes, with ``(value, state)`` columns.
+    """
+    positions = np.arange(len(df)) if rows is None else rows
+    keys = {}
+    for dim in dims:
+        codes = cached_codes(df, dim)[0]
+        keys[dim] = codes if rows is None else codes[rows]
+    columns = {}
+    for value in values:
+        column = df[value] if rows is None else df[value].take(rows)
+        columns[value] = column.reset_index(drop=True)
+
+    numeric = all(isinstance(column.dtype, np.dtype) for column in columns.values())
+    if numeric and should_parallelize(len(positions), [column.to_numpy() for column in columns.values()]):
+        arrays = {"positions": positions}
+        arrays.update({f"key:{dim}": codes for dim, codes in keys.items()})
+        arrays.update({f"value:{value}": column.to_numpy() for value, column in columns.items()})
+        partials = run_partitioned(
+            _partition_states, arrays,
+            dims=list(dims), values=list(values), states=states, keep_missing=keep_missing,
+        )
+        return rollup(pd.concat(partials), list(dims))
+    return group_states(keys, columns, positions, states, keep_missing)
+
+
+def rollup(states, levels):
+    """
+    Merge group states up to coarser ``levels`` (all groups if empty).
+    """
+    merge = {column: _MERGE[column[1]] for column in states.columns}
+    if levels:
+        return states.groupby(level=levels, sort=True).agg(merge)
+    return states.agg(merge).to_frame().T
+
+
+def finalize(states, df, values, aggfuncs):
+    """
+    Turn merged states into aggregation results with ``(agg, value)`` columns.
+    """
+    result = {}
+    for agg in aggfuncs:
+        for value in values:
+            if agg == "sum":
+                out = states[(value, "sum")]
+            elif agg in ("count", "min", "max"):
+                out = states[(value, agg)]
+            elif agg == "mean":
+                out = states[(value, "sum")] / states[(value, "count")].where(states[(value, "count")] > 0)
+            else:
+                position = states[(value, agg)]
+                present = position.notna().to_numpy()
+                taken = df[value].take(position[present].to_numpy(dtype=np.int64)).to_numpy()
+                out = pd.Series(np.nan, index=states.index, dtype=object)
+                out[present] = taken
+                out = out.infer_objects()
+            result[(agg, value)] = out
+    return pd.DataFrame(result, index=states.index)
+
+
+def decode_index(df, index):
+    """
+    Map a code-keyed group index back to the dimension values.
+    """
+    arrays = [cached_codes(df, name)[1].take(index.get_level_values(name))
+              for name in index.names]
+    if len(arrays) == 1:
+        return pd.Index(arrays[0], name=index.names[0])
+    return pd.MultiIndex.from_arrays(arrays, names=index.names)
+
+
+def flatten(states, df, values, aggfunc):
+    """
+    One aggregation of group states as a flat frame with dims and values as columns.
+    """
+    result = finalize(states, df, values, [aggfunc])
+    result.columns = values
+    result.index = decode_index(df, result.index)
+    return result.reset_index()
+
+
+def group_aggregate(df, dims, values, aggfunc="sum", rows=None):
+    """
+    ``df.groupby(dims)[values].agg(aggfunc)`` through :func:`base_states`,
+    so large inputs are aggregated in parallel.
+
+    Returns:
+        pd.DataFrame: Flat frame with the dims and values as columns.
+    """
+    return flatten(base_states(df, dims, values, states_for([aggfunc]), rows), df, values, aggfunc)
+
+
+def _margin_index(index):
+    if index.nlevels > 1:
+        return pd.MultiIndex.from_tuples([(MARGIN_LABEL,) + ("",) * (index.nlevels - 1)], names=index.names)
+    return pd.Index([MARGIN_LABEL], name=index.name)
+
+
+def _restore_integers(table, df):
+    # Unstacking introduces NaN, which turns integer results into floats
+    for column in table.columns:
+        agg, value = column[:2]
+        integral = agg == "count" or (
+            agg in ("sum", "min", "max", "first", "last") and pd.api.types.is_integer_dtype(df[value].dtype)
+        )
+        if integral and table[column].dtype.kind == "f":
+            table[column] = table[column].astype(np.int64)
+    return table
+
+
+def compute_pivot(df, rows, columns, values, aggfuncs, positions=None, margins=True, fill_value=0,
+                  states=None):
+    """
+    Pivot table computed from one grouped pass over dictionary codes.
+
+    Margins are rolled up from the base group states rather than by
+    rescanning the data, and every aggregation of every value comes out
+    of the same pass.
+
+    Args:
+        df (pd.DataFrame): Full dataset.
+        rows (list[str]): Row dimensions.
+        columns (list[str]): Column dimensions (may be empty).
+        values (list[str]): Columns to aggregate.
+        aggfuncs (list[str]): Any of ``AGGREGATIONS``.
+        positions (np.ndarray): Row positions to include, or None for all.
+        margins (bool): Add "All" subtotal row/column like ``pd.pivot_table``.
+        fill_value: Replaces cells with no data.
+        states (pd.DataFrame): Precomputed group states over ``rows +
+            columns`` (e.g. from a rollup cube); ``positions`` is then unused.
+
+    Returns:
+        pd.DataFrame: Laid out like ``pd.pivot_table``; the aggregation level
+        is only present when several aggregations are requested.
+    """
+    if states is None:
+        states = base_states(df, rows + columns, values, states_for(aggfuncs), positions)
+    table = finalize(states, df, values, aggfuncs)
+    table.index = decode_index(df, table.index)
+    if columns:
+        table = table.unstack(columns)
+
+    if margins:
+        totals = finalize(rollup(states, []), df, values, aggfuncs)
+        grand = {column: totals[column].iloc[0] for column in totals.columns}
+        if columns:
+            pad = (MARGIN_LABEL,) + ("",) * (len(columns) - 1)
+            # "All" column: each row group merged across the column dims
+            by_row = finalize(rollup(states, rows), df, values, aggfuncs)
+            by_row.index = decode_index(df, by_row.index)
+            by_row.columns = pd.MultiIndex.from_tuples([column + pad for column in by_row.columns])
+            # "All" row: each column group merged across the row dims
+            by_column = finalize(rollup(states, columns), df, values, aggfuncs)
+            by_column.index = decode_index(df, by_column.index)
+            margin_row = {column + pad: total for column, total in grand.items()}
+            for column in by_column.columns:
+                for key, total in by_column[column].items():
+                    margin_row[column + (key if isinstance(key, tuple) else (key,))] = total
+
+            table = pd.concat([table, by_row], axis=1)
+            # Each value's "All" column closes its block, as in pd.pivot_table
+            order = []
+            for margin in by_row.columns:
+                order += [column for column in table.columns if column[:2] == margin[:2] and column != margin]
+                order.append(margin)
+            table = table[order]
+        else:
+            margin_row = grand
+        margin = pd.DataFrame(
+            [[margin_row.get(column) for column in table.columns]],
+            columns=table.columns, index=_margin_index(table.index),
+        )
+        table = pd.concat([table, margin])
+
+    if fill_value is not None:
+        table = _restore_integers(table.fillna(fill_value), df)
+    if len(aggfuncs) == 1:
+        table = table.droplevel(0, axis=1)
+    return table
+
+
+def pivot(df, rows, columns, values, aggfuncs, spec=None, margins=True, fill_value=0, cubes=()):
+    """
+    :func:`compute_pivot` on the rows selected by a filter spec, memoized.
+
+    Results are cached per (dataset, filter spec, pivot spec), so reruns
+    that leave both unchanged, such as a download click, cost a lookup.
+    When one of ``cubes`` covers the request it is answered from the
+    cube's pre-aggregated states instead of the rows.
+
+    Args:
+        df (pd.DataFrame): Full dataset.
+        spec (list[dict]): Filter spec from ``filter_engine``.
+        cubes (list): Rollup cubes of ``df``, see ``rollup_cube.get_cubes``.
+        Other arguments as in :func:`compute_pivot`.
+
+    Returns:
+        pd.DataFrame: The pivot table.
+    """
+    spec = spec or []
+    # The pipeline's pivot stage key, kept in this module's own cache
+    key = stage_key("pivot", df, {
+        "filter": spec_key(spec),
+        "pivot": (tuple(rows), tuple(columns), tuple(values), tuple(aggfuncs), margins, fill_value),
+    })
+    table = _results.get(key)
+    if table is None:
+        dims = list(rows) + list(columns)
+        cube = next((cube for cube in cubes if cube.covers(dims, values, spec)), None)
+        if cube is not None:
+            states, positions = cube.query(df, dims, values, spec), None
+        else:
+            states, positions = None, filter_rows(df, spec)
+        table = _results.put(key, compute_pivot(
+            df, list(rows), list(columns), list(values), list(aggfuncs),
+            positions, margins, fill_value, states
+        ))
+    return table
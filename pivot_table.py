@@ -1,5 +1,12 @@
 import streamlit as st
-import pandas as pd
+
+from DASHBOARD.data_profile import get_profile
+from DASHBOARD.export import FORMATS, LABELS, exporter, filename, formats
+from DASHBOARD.filter_engine import cached_codes, text_index
+from DASHBOARD.pipeline import filtered
+from DASHBOARD.pivot_engine import AGGREGATIONS, pivot
+from DASHBOARD.rollup_cube import get_cubes
+from DASHBOARD.value_picker import reset_pickers, value_picker
 
 def display_pivot_table(df):
     st.title("📊 Pivot Table and Filtering")
@@ -8,94 +15,83 @@ def display_pivot_table(df):
         st.warning("The uploaded DataFrame is empty. Please upload valid data.")
         return
 
-    # Initialize filtered data in session
-    if 'filtered_df' not in st.session_state:
-        st.session_state.filtered_df = df.copy()
-
     # Reset Filters function
     def reset_filters():
-        st.session_state.filtered_df = df.copy()
-        for col in df.columns:
-            if f"{col}_filter" in st.session_state:
-                del st.session_state[f"{col}_filter"]
-            if f"{col}_range" in st.session_state:
-                del st.session_state[f"{col}_range"]
-            keys_to_delete = [k for k in st.session_state if k.startswith(f"{col}_") and k.endswith("_chk")]
-            for key in keys_to_delete:
-                del st.session_state[key]
+        reset_pickers("pivot_filters")
 
     # Reset Filters button
     if st.button("🔄 Reset All Filters"):
         reset_filters()
 
+    profile = get_profile(df)
+
     st.markdown("### 🔍 Select Column(s) to Filter")
     filter_columns = st.multiselect("Select column(s)", df.columns.tolist(), key="multi_filter_selector")
 
-    # Start filtering
-    filtered_df = df.copy()
+    # Start filtering; selections are combined into one mask below
+    spec = []
 
     for col in filter_columns:
         st.markdown(f"#### ✏️ Filter for: `{col}`")
 
-        if df[col].dtype == 'object' or df[col].dtype.name == 'category':
-            unique_vals = sorted(df[col].dropna().unique().tolist())
-            default_vals = st.session_state.get(f"{col}_filter", unique_vals)
-
-            search_query = st.text_input(f"🔎 Search in {col}", key=f"{col}_search")
-            filtered_vals = [val for val in unique_vals if search_query.lower() in str(val).lower()]
-
-            if st.button("🚫 Unselect All", key=f"{col}_unselect"):
-                for val in filtered_vals:
-                    st.session_state[f"{col}_{val}_chk"] = False
-                st.session_state[f"{col}_filter"] = []
-
-            selected_vals = []
-            for val in filtered_vals:
-                is_selected = st.checkbox(
-                    f"{val}",
-                    value=st.session_state.get(f"{col}_{val}_chk", val in default_vals),
-                    key=f"{col}_{val}_chk"
-                )
-                if is_selected:
-                    selected_vals.append(val)
-
-            st.session_state[f"{col}_filter"] = selected_vals
-            filtered_df = filtered_df[filtered_df[col].isin(selected_vals)]
+        if profile["columns"][col]["kind"] == "text":
+            # Selection is a bitset over the filter engine's column codes
+            _, dictionary = cached_codes(df, col)
+            stats = profile["columns"][col]
+            counts = stats["counts"] if stats["values"] is not None else None
+            selected = value_picker(
+                col, dictionary, key=col, group="pivot_filters",
+                # Trigram index is built on the first search, not on render
+                search=lambda query, col=col: text_index(df, col).search(query), counts=counts
+            )
+            spec.append({"column": col, "codes": selected})
 
-    # Save filtered data
-    st.session_state.filtered_df = filtered_df
+    # Filter stage result, cached per dataset and selection
+    filtered_df = filtered(df, spec)
 
     # Display filtered data
     st.markdown("### 📄 Filtered Data")
     st.dataframe(filtered_df)
 
-        # Pivot table controls (based on original df, not filtered)
+    # Pivot widgets rerun only the pivot section, not the filters and table above
+    pivot_section(df, spec)
+
+@st.fragment
+def pivot_section(df, spec):
+    """
+    Pivot setup, table and download for the rows selected by ``spec``.
+
+    Runs as a fragment: when the filters change the whole page reruns and
+    passes the new spec in.
+    """
+    # Pivot table controls (based on original df, not filtered)
     st.markdown("### 🔧 Pivot Table Setup")
 
     rows = st.multiselect("Rows", df.columns.tolist(), key="rows_selector")
     cols = st.multiselect("Columns", df.columns.tolist(), key="cols_selector")
     values = st.multiselect("Values", df.columns.tolist(), key="values_selector")
 
-    aggfunc = st.selectbox("Aggregation", ['sum', 'mean', 'count', 'first', 'last'], key="agg_selector")
+    aggfuncs = st.multiselect("Aggregation(s)", AGGREGATIONS, default=['sum'], key="agg_selector")
 
 # ⚠️ Warning for incompatible aggregation
-    if aggfunc in ['sum', 'mean']:
+    if set(aggfuncs) & {'sum', 'mean'}:
         st.warning("Note: If a user selects a non-numeric column as a 'Value' and chooses 'sum' or 'mean', it may cause errors or return unexpected results.")
 
 
-    if rows and values:
+    if rows and values and aggfuncs:
         try:
-            pivot_df = pd.pivot_table(
-                filtered_df,
-                index=rows,
-                columns=cols if cols else None,
-                values=values,
-                aggfunc=aggfunc,
-                fill_value=0,
-                margins=True
-            )
+            # Cached per dataset, filter selection and pivot layout; answered
+            # from a rollup cube when the dimensions and filters allow it
+            pivot_df = pivot(df, rows, cols, values, aggfuncs, spec=spec, cubes=get_cubes(df))
             st.subheader("📊 Pivot Table")
             st.dataframe(pivot_df)
-            st.download_button("Download Pivot Table", pivot_df.to_csv().encode(), "pivot_table.csv", "text/csv")
+            # Remembered for the workbook in the Downloads section
+            st.session_state.pivot_request = (rows, cols, values, aggfuncs, spec)
+            fmt = st.selectbox("Download format", formats(), format_func=LABELS.get, key="pivot_format")
+            # The file is only written when the button is clicked
+            st.download_button(
+                "Download Pivot Table", exporter(lambda: pivot_df, fmt, index=True),
+                filename("pivot_table", fmt), FORMATS[fmt]
+            )
         except Exception as e:
             st.error(f"❌ Error creating pivot table: {e}")
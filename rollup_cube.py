@@ -0,0 +1,204 @@
+# DASHBOARD/rollup_cube.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from DASHBOARD.data_profile import columns_of, get_profile
+from DASHBOARD.dataset_cache import dataset_key, load_sidecar, store_sidecar
+from DASHBOARD.filter_engine import cached_codes, expand_hits, value_hits
+from DASHBOARD.memory_cache import BoundedCache, sizeof
+from DASHBOARD.pivot_engine import base_states, flatten, rollup
+
+CUBE_ENABLED = os.environ.get("DASHBOARD_CUBE", "1") != "0"
+# Semicolon-separated dimension sets; "@datetime" stands for the dataset's date columns
+DIMENSION_SETS = [
+    [name.strip() for name in group.split(",") if name.strip()]
+    for group in os.environ.get(
+        "DASHBOARD_CUBE_DIMENSIONS", "FC,ZONE,PICKUP_CITY,@datetime;FC,ZONE,PICKUP_CITY"
+    ).split(";")
+]
+# A cube with more groups than this fraction of the rows saves too little to keep
+MAX_GROUP_RATIO = float(os.environ.get("DASHBOARD_CUBE_MAX_RATIO", "0.1"))
+CUBE_CACHE_BYTES = int(os.environ.get("DASHBOARD_CUBE_CACHE_MB", "256")) * 1024**2
+STATES = ["sum", "count", "min", "max", "first", "last"]
+
+_cubes = BoundedCache(CUBE_CACHE_BYTES)
+
+
+class RollupCube:
+    """
+    Mergeable aggregates (sum, count, min, max, first/last position) of
+    every numeric column, grouped by one set of dimension columns.
+
+    Groups are keyed by the dimensions' dictionary codes, including the
+    missing-value code, so any subset of the dimensions can be rolled up
+    exactly and filters on dimension columns apply to whole groups.
+    """
+
+    def __init__(self, dims, measures, states):
+        self.dims = dims
+        self.measures = measures
+        self.states = states
+        self.nbytes = sizeof(states)
+
+    def covers(self, dims, values, spec=None):
+        """
+        Whether a request over ``dims``/``values`` filtered by ``spec`` fits.
+        """
+        filtered = set()
+        for condition in spec or []:
+            columns = condition["column"]
+            filtered |= set(columns) if isinstance(columns, list) else {columns}
+        return (set(dims) | filtered) <= set(self.dims) and set(values) <= set(self.measures)
+
+    def query(self, df, dims, values, spec=None):
+        """
+        Group states over ``dims``, rolled up from the cube.
+
+        Returns:
+            pd.DataFrame: Same layout as ``pivot_engine.base_states``; groups
+            with a missing ``dims`` key are dropped.
+        """
+        states = self.states[[column for column in self.states.columns if column[0] in values]]
+        if spec:
+            keep = np.ones(len(states), dtype=bool)
+            for condition in spec:
+                columns = condition["column"]
+                match = np.zeros(len(states), dtype=bool)
+                for column in columns if isinstance(columns, list) else [columns]:
+                    codes = states.index.get_level_values(column).to_numpy()
+                    match |= expand_hits(codes, value_hits(df, column, condition))
+                keep &= match
+            states = states[keep]
+
+        states = rollup(states, dims)
+        if dims:
+            present = np.ones(len(states), dtype=bool)
+            for dim in dims:
+                present &= states.index.get_level_values(dim).to_numpy() >= 0
+            states = states[present]
+        return states
+
+
+def _dimension_sets(df, profile):
+    dates = columns_of(profile, "datetime")
+    sets = []
+    for group in DIMENSION_SETS:
+        dims = []
+        for name in group:
+            dims += dates if name == "@datetime" else [name]
+        dims = list(dict.fromkeys(dims))
+        if dims and all(dim in df.columns for dim in dims) and dims not in sets:
+            sets.append(dims)
+    return sets
+
+
+def build_cubes(df, profile=None):
+    """
+    Build a cube for every configured dimension set the dataset has.
+
+    Sets whose group count exceeds ``MAX_GROUP_RATIO`` of the rows are
+    skipped, since rolling them up would cost about as much as a scan.
+
+    Returns:
+        list[RollupCube]: Cubes ordered from fewest to most groups.
+    """
+    profile = profile or get_profile(df)
+    measures = columns_of(profile, "numeric")
+    limit = MAX_GROUP_RATIO * len(df)
+    cubes = []
+    for dims in _dimension_sets(df, profile):
+        values = [name for name in measures if name not in dims]
+        if not values:
+            continue
+        # A single dimension above the limit rules the set out without a pass
+        if any(profile["columns"][dim]["cardinality"] > limit for dim in dims):
+            continue
+        states = base_states(df, dims, values, STATES, keep_missing=True)
+        if len(states) <= limit:
+            cubes.append(RollupCube(dims, values, states))
+    return sorted(cubes, key=lambda cube: len(cube.states))
+
+
+def get_cubes(df):
+    """
+    Rollup cubes of a dataset, built once and cached in memory and on disk.
+
+    Returns:
+        list[RollupCube]: Empty when cubes are disabled or none fit.
+    """
+    if not CUBE_ENABLED or df.empty:
+        return []
+    key = dataset_key(df)
+    cubes = _cubes.get(key)
+    if cubes is None:
+        on_disk = key == df.attrs.get("content_hash")
+        cubes = load_sidecar(key, "cube") if on_disk else None
+        if cubes is None:
+            cubes = build_cubes(df)
+            if on_disk:
+                store_sidecar(key, "cube", cubes)
+        _cubes.put(key, cubes)
+    return cubes
+
+
+def _recode(index, previous, df):
+    # Codes index each column's sorted dictionary, which new values can shift
+    levels = []
+    for name in index.names:
+        mapping = cached_codes(df, name)[1].get_indexer(cached_codes(previous, name)[1])
+        codes = index.get_level_values(name).to_numpy()
+        levels.append(np.where(codes >= 0, mapping[codes], -1).astype(codes.dtype))
+    if len(levels) == 1:
+        return pd.Index(levels[0], name=index.names[0])
+    return pd.MultiIndex.from_arrays(levels, names=index.names)
+
+
+def extend_cubes(df, previous, start):
+    """
+    Cubes of ``df``, which is ``previous`` with rows appended from position
+    ``start``: the states of the new rows are merged into the cubes of
+    ``previous`` instead of aggregating every row again.
+
+    Returns:
+        list[RollupCube]: See :func:`get_cubes`.
+    """
+    if not CUBE_ENABLED or df.empty:
+        return []
+    key = dataset_key(previous)
+    old = _cubes.get(key)
+    if old is None and key == previous.attrs.get("content_hash"):
+        old = load_sidecar(key, "cube")
+    if old is None:
+        return get_cubes(df)
+
+    rows = np.arange(start, len(df))
+    cubes = []
+    for cube in old:
+        if not all(pd.api.types.is_numeric_dtype(df[measure].dtype) for measure in cube.measures):
+            return get_cubes(df)
+        states = cube.states.set_axis(_recode(cube.states.index, previous, df), axis=0)
+        added = base_states(df, cube.dims, cube.measures, STATES, rows=rows, keep_missing=True)
+        cubes.append(RollupCube(cube.dims, cube.measures, rollup(pd.concat([states, added]), cube.dims)))
+    cubes.sort(key=lambda cube: len(cube.states))
+
+    key = dataset_key(df)
+    if key == df.attrs.get("content_hash"):
+        store_sidecar(key, "cube", cubes)
+    return _cubes.put(key, cubes)
+
+
+def aggregate(df, dims, values, aggfunc="sum", spec=None):
+    """
+    ``df.groupby(dims)[values].agg(aggfunc)`` answered from a rollup cube.
+
+    Returns:
+        pd.DataFrame | None: Flat frame with the dims and values as columns,
+        or None when no cube covers the request.
+    """
+    cube = next((cube for cube in get_cubes(df) if cube.covers(dims, values, spec)), None)
+    if cube is None:
+        return None
+    return flatten(cube.query(df, dims, values, spec), df, values, aggfunc)
@@ -0,0 +1,105 @@
+# DASHBOARD/sampling.py
+
+import os
+
+import numpy as np
+
+from DASHBOARD.data_profile import columns_of
+from DASHBOARD.dataset_cache import dataset_key
+from DASHBOARD.downsample import POINT_BUDGET
+from DASHBOARD.filter_engine import cached_codes
+from DASHBOARD.memory_cache import BoundedCache
+
+SAMPLE_CACHE_BYTES = int(os.environ.get("DASHBOARD_SAMPLE_CACHE_MB", "32")) * 1024**2
+# Strata smaller than this keep all their rows when the budget allows
+MIN_PER_STRATUM = 5
+# Text columns with more distinct values than this are not used as strata
+MAX_STRATA = 50
+
+_samples = BoundedCache(SAMPLE_CACHE_BYTES)
+
+
+def sample_size(n_rows, budget=POINT_BUDGET):
+    """
+    Rows to sample for a point-level chart: as many as the chart can draw.
+    """
+    return min(n_rows, budget)
+
+
+def uniform_positions(n_rows, k, seed=1):
+    """
+    Sorted positions of a uniform random sample of ``k`` out of ``n_rows`` rows.
+    """
+    if k >= n_rows:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, k, replace=False))
+
+
+def stratified_positions(codes, k, seed=1):
+    """
+    Stratified random sample: every stratum gets a share of ``k``
+    proportional to its size, but at least ``MIN_PER_STRATUM`` rows (or
+    all of them), so rare groups still show up in the chart.
+
+    Args:
+        codes (np.ndarray): Stratum code per row; -1 (missing) is a stratum too.
+        k (int): Target sample size; the minimum per stratum can exceed it
+            slightly.
+
+    Returns:
+        np.ndarray: Sorted row positions.
+    """
+    n_rows = len(codes)
+    if k >= n_rows:
+        return np.arange(n_rows)
+    codes = codes.astype(np.int64) + 1
+    sizes = np.bincount(codes)
+    quota = np.minimum(sizes, np.maximum(np.floor(sizes * (k / n_rows)), MIN_PER_STRATUM)).astype(np.int64)
+    if quota.sum() > 2 * k:  # Too many strata for the budget
+        return uniform_positions(n_rows, k, seed)
+    rng = np.random.default_rng(seed)
+    # Shuffle within strata, then keep each stratum's first `quota` rows
+    order = np.lexsort((rng.random(n_rows), codes))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    stratum = codes[order]
+    rank = np.arange(n_rows) - starts[stratum]
+    return np.sort(order[rank < quota[stratum]])
+
+
+def sample_rows(df, k, stratify=None, seed=1):
+    """
+    Sample of ``df`` for point-level charts, memoized per dataset.
+
+    Args:
+        df (pd.DataFrame): Full dataset.
+        k (int): Target sample size.
+        stratify (str): Column to stratify by; uniform sampling if None.
+
+    Returns:
+        pd.DataFrame: Sampled rows in their original order.
+    """
+    if k >= len(df):
+        return df
+    key = ("sample", dataset_key(df), k, stratify, seed)
+    positions = _samples.get(key)
+    if positions is None:
+        if stratify is None:
+            positions = uniform_positions(len(df), k, seed)
+        else:
+            positions = stratified_positions(cached_codes(df, stratify)[0], k, seed)
+        positions = _samples.put(key, positions)
+    return df.take(positions)
+
+
+def overview_sample(df, profile, budget=POINT_BUDGET):
+    """
+    Sample for the overview's scatter and box plots, sized by the point
+    budget and stratified by the first text column with at most
+    ``MAX_STRATA`` distinct values; uniform if no column qualifies.
+    """
+    strata = [
+        name for name in columns_of(profile, "text")
+        if 0 < profile["columns"][name]["cardinality"] <= MAX_STRATA
+    ]
+    return sample_rows(df, sample_size(len(df), budget), strata[0] if strata else None)
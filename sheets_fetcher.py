@@ -0,0 +1,216 @@
+# DASHBOARD/sheets_fetcher.py
+
+import asyncio
+import html
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from DASHBOARD.dataset_cache import content_hash
+
+# Point at a stand-in server to test without Google
+BASE_URL = os.environ.get("DASHBOARD_SHEETS_BASE_URL", "https://docs.google.com").rstrip("/")
+# (connect, read) seconds per request
+TIMEOUT = (10, float(os.environ.get("DASHBOARD_SHEETS_TIMEOUT", "60")))
+RETRIES = int(os.environ.get("DASHBOARD_SHEETS_RETRIES", "3"))
+# Tabs downloaded at the same time; also the connection pool size
+MAX_CONCURRENCY = int(os.environ.get("DASHBOARD_SHEETS_CONCURRENCY", "4"))
+
+# Tab entries in the workbook's htmlview page
+_TAB_ITEM = re.compile(r'items\.push\(\{name:\s*"((?:[^"\\]|\\.)*)"')
+_TAB_BUTTON = re.compile(r'<li id="sheet-button-[^"]*"[^>]*>\s*<a[^>]*>([^<]*)</a>')
+
+_session = None
+_session_lock = threading.Lock()
+# Validators and content key of the last response per URL
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def session():
+    """
+    Shared HTTP session with a connection pool and retries on transient
+    failures (connection errors, 429 and 5xx) with exponential backoff.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES, backoff_factor=0.5, allowed_methods=["GET"],
+                status_forcelist=(429, 500, 502, 503, 504),
+            )
+            adapter = HTTPAdapter(pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def export_url(sheet_id, sheet_name):
+    """
+    CSV export URL of one tab.
+    """
+    return f"{BASE_URL}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={quote(sheet_name)}"
+
+
+def tab_names(sheet_id):
+    """
+    Names of all tabs of a public workbook, in workbook order.
+
+    Read from the workbook's ``htmlview`` page, which needs no API key.
+
+    Returns:
+        list[str]: Tab names; empty if the page lists none.
+    """
+    response = session().get(f"{BASE_URL}/spreadsheets/d/{sheet_id}/htmlview", timeout=TIMEOUT)
+    response.raise_for_status()
+    page = response.text
+    names = [json.loads(f'"{name}"') for name in _TAB_ITEM.findall(page)]
+    if not names:
+        names = [html.unescape(name).strip() for name in _TAB_BUTTON.findall(page)]
+    return list(dict.fromkeys(names))
+
+
+def fetch(url, tag, conditional=True):
+    """
+    Download a CSV export, revalidating against the previous response.
+
+    The request carries ``If-None-Match``/``If-Modified-Since`` from the
+    last response for the URL; a 304 answer skips the body entirely.
+
+    Args:
+        url (str): Export URL.
+        tag (str): Loader name mixed into the content key.
+        conditional (bool): Send the stored validators.
+
+    Returns:
+        tuple[str, bytes | None]: Content key (see ``content_hash``) and the
+        body, or None as body when the server reported it unchanged.
+    """
+    with _validators_lock:
+        known = _validators.get(url) if conditional else None
+    headers = {}
+    if known:
+        if known["etag"]:
+            headers["If-None-Match"] = known["etag"]
+        if known["last_modified"]:
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    response = session().get(url, headers=headers, timeout=TIMEOUT)
+    if response.status_code == 304 and known:
+        return known["key"], None
+    response.raise_for_status()
+    raw = response.content
+    key = content_hash(raw, tag)
+    with _validators_lock:
+        _validators[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "key": key,
+        }
+    return key, raw
+
+
+async def _fetch_all(urls, tag, conditional):
+    limit = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def fetch_one(url):
+        async with limit:
+            # Blocking pooled client on worker threads; the semaphore caps connections
+            return await asyncio.to_thread(fetch, url, tag, conditional)
+
+    return await asyncio.gather(*(fetch_one(url) for url in urls))
+
+
+def fetch_all(urls, tag, conditional=True):
+    """
+    :func:`fetch` several URLs concurrently, at most ``MAX_CONCURRENCY`` at a time.
+
+    Returns:
+        list[tuple[str, bytes | None]]: Results in the order of ``urls``.
+    """
+    return asyncio.run(_fetch_all(list(urls), tag, conditional))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        tabs = self.server.workbooks.get(parts[2]) if len(parts) >= 4 and parts[:2] == ["spreadsheets", "d"] else None
+        self.server.requests.append(self.path)
+        if tabs is None:
+            self.send_error(404)
+        elif parts[3] == "htmlview":
+            items = "".join(f"items.push({{name: {json.dumps(name)}, gid: \"{gid}\"}});" for gid, name in enumerate(tabs))
+            self._send(f"<html><script>{items}</script></html>".encode(), "text/html")
+        elif parts[3:] == ["gviz", "tq"]:
+            name = parse_qs(url.query).get("sheet", [""])[0]
+            if name not in tabs:
+                self.send_error(400)
+                return
+            etag = f'"{content_hash(tabs[name])[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(tabs[name], "text/csv", etag)
+        else:
+            self.send_error(404)
+
+    def _send(self, body, mime, etag=None):
+        self.send_response(200)
+        self.send_header("Content-Type", mime)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_stand_in(workbooks, host="127.0.0.1", port=0):
+    """
+    Start a local stand-in for the Google Sheets endpoints used here.
+
+    Serves ``htmlview`` tab listings and gviz CSV exports with ETags, for
+    trying the fetcher offline: point ``BASE_URL`` at ``server.url``.
+    Requests are recorded in ``server.requests``; call ``server.shutdown()``
+    when done.
+
+    Args:
+        workbooks (dict[str, dict[str, bytes]]): CSV bytes by tab name, per
+            sheet id. Edit it while serving to simulate sheet changes.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    server = ThreadingHTTPServer((host, port), _StandInHandler)
+    server.daemon_threads = True
+    server.workbooks = workbooks
+    server.requests = []
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="sheets-stand-in", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    tabs = {f"Day {day}": f"FC,QTY\nBLR,{day}\nDEL,{day * 2}\n".encode() for day in range(1, 9)}
+    server = serve_stand_in({"demo": tabs})
+    BASE_URL = server.url
+    names = tab_names("demo")
+    print("tabs:", names)
+    first = fetch_all([export_url("demo", name) for name in names], "demo")
+    print("downloaded:", sum(raw is not None for _, raw in first))
+    tabs["Day 1"] += b"MUM,9\n"
+    second = fetch_all([export_url("demo", name) for name in names], "demo")
+    print("changed on refresh:", [name for name, (_, raw) in zip(names, second) if raw is not None])
+    server.shutdown()
@@ -0,0 +1,488 @@
+# DASHBOARD/sketches.py
+
+import copy
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from DASHBOARD.data_profile import columns_of, get_profile
+from DASHBOARD.dataset_cache import dataset_key, load_sidecar, store_sidecar
+from DASHBOARD.filter_engine import cached_codes
+from DASHBOARD.memory_cache import BoundedCache
+from DASHBOARD.parallel_agg import run_partitioned, should_parallelize
+
+# Smaller datasets are summarized exactly; sketches only pay off at scale
+SKETCH_MIN_ROWS = int(os.environ.get("DASHBOARD_SKETCH_MIN_ROWS", "100000"))
+# KLL accuracy parameter: rank error stays below RANK_ERROR / k, see KLL
+KLL_K = int(os.environ.get("DASHBOARD_KLL_K", "200"))
+RANK_ERROR = 2.5
+# HyperLogLog uses 2**p registers: relative error about 1.04 / sqrt(2**p)
+HLL_P = 14
+# Box plots get one box per group of a text column with at most this many values
+MAX_GROUPS = 50
+SKETCH_CACHE_BYTES = int(os.environ.get("DASHBOARD_SKETCH_CACHE_MB", "64")) * 1024**2
+# Rows fed to the sketches at a time
+_CHUNK_ROWS = 1_000_000
+
+_sketches = BoundedCache(SKETCH_CACHE_BYTES)
+
+
+class KLL:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016) over float values.
+
+    Items live in a stack of compactors; level ``h`` items stand for
+    ``2**h`` inputs. A full level is sorted and every other item (random
+    offset) is promoted, so the sketch keeps ``O(k)`` items however many
+    values it sees, and two sketches merge by stacking their levels.
+
+    Error bound: a quantile query returns an item whose normalized rank is
+    within ``RANK_ERROR / k`` of the requested one with high probability
+    (1.25% for the default ``k=200``; typically well under 1%), independent
+    of the input size and order. The minimum and maximum are tracked exactly.
+    :func:`check_rank_error` verifies the bound empirically.
+    """
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically less room than the top one
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        full = True
+        while full:
+            full = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if len(items) <= self._capacity(level):
+                    continue
+                full = True
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays so that no input weight is lost
+                keep = items[:len(items) % 2]
+                promoted = items[len(keep):][self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values):
+        """
+        Add values; NaN is ignored.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one, as if it had seen both inputs.
+        """
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2**level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """
+        Approximate quantiles; ``q=0`` and ``q=1`` give the exact min and max.
+
+        Returns:
+            np.ndarray: One value per q (NaN if the sketch is empty).
+        """
+        qs = np.asarray(qs, dtype=float)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = items[np.minimum(positions, len(items) - 1)]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def rank(self, value):
+        """
+        Approximate fraction of values less than or equal to ``value``.
+        """
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted()
+        position = np.searchsorted(items, value, side="right")
+        return cumulative[position - 1] / cumulative[-1] if position else 0.0
+
+
+def _bit_length(values):
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= np.uint64(1 << shift)
+        values = np.where(high, values >> np.uint64(shift), values)
+        length += high * np.uint8(shift)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch (Flajolet et al. 2007).
+
+    Values are hashed with pandas' 64-bit hash. Each hash picks one of
+    ``2**p`` registers, which keeps the longest run of leading zeros seen.
+    Sketches merge by taking the register-wise maximum.
+
+    Error bound: the standard error of :meth:`count` is ``1.04 / sqrt(2**p)``,
+    about 0.8% for the default ``p=14`` (16 KB of registers). Small
+    cardinalities use linear counting and are close to exact.
+    """
+
+    def __init__(self, p=HLL_P):
+        self.p = p
+        self.registers = np.zeros(2**p, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Add values (array or Series); missing values are ignored.
+        """
+        values = pd.Series(values).dropna()
+        if len(values):
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+            width = 64 - self.p
+            index = (hashes >> np.uint64(width)).astype(np.int64)
+            rest = hashes & np.uint64((1 << width) - 1)
+            # Position of the first 1-bit in the remaining bits
+            rank = (width + 1 - _bit_length(rest)).astype(np.uint8)
+            np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """
+        Estimated number of distinct values.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class SketchSet:
+    """
+    Sketches of one dataset: a KLL sketch per numeric column, overall and
+    per group of ``by``, and a HyperLogLog sketch per column.
+    """
+
+    def __init__(self, by, groups, quantile, grouped, distinct):
+        self.by = by
+        self.groups = groups
+        self.quantile = quantile
+        self.grouped = grouped
+        self.distinct = distinct
+
+    def five_numbers(self, column):
+        """
+        Min, quartiles and max of a column per group of ``by``.
+
+        Returns:
+            pd.DataFrame: Indexed by group, with ``count``, ``min``, ``q1``,
+            ``median``, ``q3`` and ``max`` columns; empty groups are left out.
+        """
+        sketches = self.grouped.get(column) or [self.quantile[column]]
+        rows = [
+            [sketch.n, *sketch.quantiles([0, 0.25, 0.5, 0.75, 1])]
+            for sketch in sketches
+        ]
+        index = self.groups.rename(self.by) if self.by else pd.Index([column])
+        summary = pd.DataFrame(rows, index=index, columns=["count", "min", "q1", "median", "q3", "max"])
+        return summary[summary["count"] > 0]
+
+
+def _empty_sketches(columns, n_groups, k):
+    quantile = {column: KLL(k) for column in columns}
+    grouped = {column: [KLL(k, seed=group + 1) for group in range(n_groups)] for column in columns}
+    return quantile, grouped
+
+
+def _sketch_chunk(quantile, grouped, distinct, values, codes):
+    if codes is not None:
+        # Rows of each group are contiguous in this order; missing keys sort first
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(next(iter(grouped.values()))) + 1))
+    for column, chunk in values.items():
+        quantile[column].update(chunk)
+        distinct[column].update(chunk)
+        if codes is not None:
+            for group, sketch in enumerate(grouped[column]):
+                sketch.update(chunk[order[bounds[group]:bounds[group + 1]]])
+
+
+def _partition_sketches(arrays, start, columns, n_groups, k):
+    # Runs in a worker process on one row range of the shared arrays
+    quantile, grouped = _empty_sketches(columns, n_groups, k)
+    distinct = {column: HyperLogLog() for column in columns}
+    codes = arrays.get("codes")
+    for offset in range(0, len(arrays[columns[0]]), _CHUNK_ROWS):
+        window = slice(offset, offset + _CHUNK_ROWS)
+        values = {column: arrays[column][window] for column in columns}
+        _sketch_chunk(quantile, grouped, distinct, values, None if codes is None else codes[window])
+    return quantile, grouped, distinct
+
+
+def build_sketches(df, profile=None, k=KLL_K):
+    """
+    Build all sketches of a dataset in one chunked pass.
+
+    Numeric columns are processed in a process pool on large data, with the
+    per-partition sketches merged afterwards.
+
+    Returns:
+        SketchSet: The dataset's sketches.
+    """
+    profile = profile or get_profile(df)
+    numeric = [name for name in columns_of(profile, "numeric") if isinstance(df[name].dtype, np.dtype)]
+    by = next((
+        name for name in columns_of(profile, "text")
+        if 0 < profile["columns"][name]["cardinality"] <= MAX_GROUPS
+    ), None)
+    codes, groups = cached_codes(df, by) if by else (None, None)
+    n_groups = len(groups) if by else 0
+
+    arrays = {column: df[column].to_numpy() for column in numeric}
+    if codes is not None:
+        arrays["codes"] = codes
+    if numeric and should_parallelize(len(df), arrays.values()):
+        partials = run_partitioned(_partition_sketches, arrays, columns=numeric, n_groups=n_groups, k=k)
+        quantile, grouped, distinct = partials[0]
+        for part_quantile, part_grouped, part_distinct in partials[1:]:
+            for column in numeric:
+                quantile[column].merge(part_quantile[column])
+                distinct[column].merge(part_distinct[column])
+                for sketch, part in zip(grouped[column], part_grouped[column]):
+                    sketch.merge(part)
+    elif numeric:
+        quantile, grouped, distinct = _partition_sketches(arrays, 0, numeric, n_groups, k)
+    else:
+        quantile, grouped, distinct = {}, {}, {}
+
+    for column in df.columns.unique():
+        if column not in distinct:
+            sketch = distinct[column] = HyperLogLog()
+            for offset in range(0, len(df), _CHUNK_ROWS):
+                sketch.update(df[column].iloc[offset:offset + _CHUNK_ROWS])
+    return SketchSet(by, groups, quantile, grouped if by else {}, distinct)
+
+
+def get_sketches(df):
+    """
+    Sketches of a dataset, built once and cached in memory and on disk.
+
+    Returns:
+        SketchSet | None: None for datasets below ``SKETCH_MIN_ROWS``, which
+        are cheap to summarize exactly.
+    """
+    if len(df) < SKETCH_MIN_ROWS:
+        return None
+    key = dataset_key(df)
+    sketches = _sketches.get(key)
+    if sketches is None:
+        on_disk = key == df.attrs.get("content_hash")
+        sketches = load_sidecar(key, "sketch") if on_disk else None
+        if sketches is None:
+            sketches = build_sketches(df)
+            if on_disk:
+                store_sidecar(key, "sketch", sketches)
+        _sketches.put(key, sketches)
+    return sketches
+
+
+def extend_sketches(df, previous, start):
+    """
+    Sketches of ``df``, which is ``previous`` with rows appended from
+    position ``start``: sketches of the new rows are merged into copies of
+    the sketches of ``previous`` instead of scanning every row again.
+
+    Returns:
+        SketchSet | None: See :func:`get_sketches`.
+    """
+    if len(df) < SKETCH_MIN_ROWS:
+        return None
+    key = dataset_key(previous)
+    old = _sketches.get(key)
+    if old is None and key == previous.attrs.get("content_hash"):
+        old = load_sidecar(key, "sketch")
+    numeric = list(old.quantile) if old is not None else []
+    groups = cached_codes(df, old.by)[1] if old is not None and old.by else None
+    if old is None or (groups is not None and len(groups) > MAX_GROUPS) \
+            or not all(isinstance(df[column].dtype, np.dtype) for column in numeric):
+        return get_sketches(df)
+
+    delta = df.iloc[start:]
+    arrays = {column: delta[column].to_numpy() for column in numeric}
+    if old.by:
+        arrays["codes"] = cached_codes(df, old.by)[0][start:]
+    sketches = copy.deepcopy(old)
+    if numeric:
+        quantile, grouped, distinct = _partition_sketches(arrays, 0, numeric, len(groups) if old.by else 0, KLL_K)
+        if old.by:
+            # Regroup the old per-group sketches under the new dictionary codes
+            mapping = groups.get_indexer(cached_codes(previous, old.by)[1])
+            for column in numeric:
+                for code, sketch in zip(mapping, sketches.grouped[column]):
+                    grouped[column][code].merge(sketch)
+            sketches.grouped, sketches.groups = grouped, groups
+        for column in numeric:
+            sketches.quantile[column].merge(quantile[column])
+            sketches.distinct[column].merge(distinct[column])
+    for column in df.columns.unique():
+        if column not in numeric:
+            sketches.distinct.setdefault(column, HyperLogLog()).update(delta[column])
+
+    key = dataset_key(df)
+    if key == df.attrs.get("content_hash"):
+        store_sidecar(key, "sketch", sketches)
+    return _sketches.put(key, sketches)
+
+
+def quantiles(df, column, qs):
+    """
+    Approximate quantiles of a column from its sketch.
+
+    Returns:
+        np.ndarray | None: One value per q, or None when the column has no
+        sketch (small data or non-numeric column).
+    """
+    sketches = get_sketches(df)
+    if sketches is None or column not in sketches.quantile:
+        return None
+    return sketches.quantile[column].quantiles(qs)
+
+
+def five_numbers(df, column):
+    """
+    Per-group five-number summary of a column from its sketches, see
+    :meth:`SketchSet.five_numbers`, or None when the column has no sketch.
+    """
+    sketches = get_sketches(df)
+    if sketches is None or column not in sketches.quantile:
+        return None
+    return sketches.five_numbers(column)
+
+
+def distinct_count(df, column):
+    """
+    Approximate number of distinct values of a column, or None without sketches.
+    """
+    sketches = get_sketches(df)
+    return None if sketches is None else sketches.distinct[column].count()
+
+
+def check_rank_error(n=1_000_000, k=KLL_K, trials=5, seed=0):
+    """
+    Measure the KLL rank error and HyperLogLog count error on synthetic data.
+
+    Each trial feeds a sorted, a reversed and a random-order heavy-tailed
+    input in chunks to two sketches and merges them, so chunked updates,
+    merging and adversarial orders are all covered.
+
+    Returns:
+        dict: Largest observed normalized rank error and relative count error.
+
+    Raises:
+        RuntimeError: If an error exceeds its documented bound.
+    """
+    rng = np.random.default_rng(seed)
+    qs = np.linspace(0.01, 0.99, 99)
+    worst_rank = worst_count = 0.0
+    for trial in range(trials):
+        for values in (np.arange(n, dtype=float), np.arange(n, 0, -1, dtype=float), rng.pareto(1.5, n)):
+            halves = np.array_split(values, 2)
+            sketch = KLL(k, seed=trial)
+            for chunk in np.array_split(halves[0], 10):
+                sketch.update(chunk)
+            sketch.merge(KLL(k, seed=trial + 100).update(halves[1]))
+            exact = np.sort(values)
+            ranks = np.searchsorted(exact, sketch.quantiles(qs), side="right") / n
+            worst_rank = max(worst_rank, float(np.max(np.abs(ranks - qs))))
+
+        distinct = int(rng.integers(1_000, n))
+        items = rng.integers(0, distinct, n)
+        true = len(np.unique(items))
+        left, right = np.array_split(items, 2)
+        estimate = HyperLogLog().update(left).merge(HyperLogLog().update(right)).count()
+        worst_count = max(worst_count, abs(estimate - true) / true)
+
+    if worst_rank > RANK_ERROR / k:
+        raise RuntimeError(f"KLL rank error {worst_rank:.4f} exceeds {RANK_ERROR / k:.4f}")
+    # Three standard errors
+    if worst_count > 3 * 1.04 / np.sqrt(2**HLL_P):
+        raise RuntimeError(f"HLL error {worst_count:.4f} too large")
+    return {"kll_rank_error": round(worst_rank, 5), "hll_relative_error": round(worst_count, 5)}
+
+
+def benchmark(sizes=(1_000_000, 10_000_000)):
+    """
+    Time exact medians and distinct counts against sketch construction and
+    queries.
+
+    Returns:
+        list[dict]: One row per size with seconds for each operation.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        values = rng.lognormal(size=size)
+        start = time.perf_counter()
+        exact_median = np.median(values)
+        exact_distinct = len(np.unique(values.round(2)))
+        exact = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kll, hll = KLL(), HyperLogLog()
+        for offset in range(0, size, _CHUNK_ROWS):
+            kll.update(values[offset:offset + _CHUNK_ROWS])
+            hll.update(values[offset:offset + _CHUNK_ROWS].round(2))
+        built = time.perf_counter()
+        median, distinct = kll.quantiles([0.5])[0], hll.count()
+        queried = time.perf_counter()
+        results.append({
+            "rows": size, "exact_s": round(exact, 3),
+            "build_s": round(built - start, 3), "query_s": round(queried - built, 5),
+            "median_rank_error": round(abs(np.mean(values <= median) - 0.5), 5),
+            "distinct_error": round(abs(distinct - exact_distinct) / exact_distinct, 5),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(check_rank_error())
+    print(pd.DataFrame(benchmark()).to_string(index=False))
@@ -0,0 +1,191 @@
+# DASHBOARD/startup.py
+
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ASSET_DIR = os.environ.get(
+    "DASHBOARD_ASSET_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "dashboard", "assets"),
+)
+LOGO_URL = os.environ.get(
+    "DASHBOARD_LOGO_URL",
+    "https://static.vecteezy.com/system/resources/previews/017/208/926/non_2x/luxury-letter-v-logo-v-logotype-for-elegant-and-stylish-fashion-symbol-vector.jpg",
+)
+# Shown while the logo is not on disk yet
+FALLBACK_ICON = "📊"
+ASSET_TIMEOUT = 10
+# Seconds allowed for the first run of fc_script in a fresh process, and for a rerun
+COLD_START_BUDGET = float(os.environ.get("DASHBOARD_COLD_START_BUDGET", "6"))
+RERUN_BUDGET = float(os.environ.get("DASHBOARD_RERUN_BUDGET", "0.5"))
+# Rows of the generated CSV the check uploads, and seconds allowed for the run
+# that loads it and renders the default section
+FIXTURE_ROWS = int(os.environ.get("DASHBOARD_FIXTURE_ROWS", "200000"))
+LOAD_BUDGET = float(os.environ.get("DASHBOARD_LOAD_BUDGET", "10"))
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fc_script.py")
+
+_downloads = set()
+_downloads_lock = threading.Lock()
+
+
+def _asset_path(url):
+    name = hashlib.sha256(url.encode()).hexdigest()[:16]
+    return os.path.join(ASSET_DIR, name + os.path.splitext(url.split("?")[0])[1])
+
+
+def _download(url, path):
+    import requests
+
+    try:
+        response = requests.get(url, timeout=ASSET_TIMEOUT)
+        response.raise_for_status()
+        os.makedirs(ASSET_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp, path)
+    except Exception:
+        pass  # Retried by the next process
+    finally:
+        with _downloads_lock:
+            _downloads.discard(url)
+
+
+def asset(url):
+    """
+    Local copy of a remote image, downloaded once per machine.
+
+    Never blocks the script: the first call starts the download on a
+    background thread and returns None, so pages render without the asset
+    until it is on disk.
+
+    Returns:
+        str | None: Path of the cached file, or None if not downloaded yet.
+    """
+    path = _asset_path(url)
+    if os.path.exists(path):
+        return path
+    with _downloads_lock:
+        if url in _downloads:
+            return None
+        _downloads.add(url)
+    threading.Thread(target=_download, args=(url, path), name="asset-download", daemon=True).start()
+    return None
+
+
+def page_icon():
+    """
+    Logo for ``st.set_page_config``, or an emoji until it is cached.
+    """
+    return asset(LOGO_URL) or FALLBACK_ICON
+
+
+def fixture_csv(n_rows=FIXTURE_ROWS, seed=1):
+    """
+    Generated CSV in the shape of the sample template, for the load check.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "FC": rng.choice(["MUM", "DEL", "BLR", "HYD", "CHE"], n_rows),
+        "ZONE": rng.choice(["N", "S", "E", "W"], n_rows),
+        "PICKUP_CITY": rng.choice(["Pune", "Delhi", "Mumbai", "Chennai", ""], n_rows),
+        "QTY": rng.integers(1, 20, n_rows),
+        "AMOUNT": rng.random(n_rows).round(4) * 1000,
+        "DATE": pd.date_range("2024-01-01", periods=n_rows, freq="min"),
+        "SKU": [f"SKU-{i}" for i in rng.integers(0, 5000, n_rows)],
+    }).to_csv(index=False).encode()
+
+
+def _median(app, runs=5):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def _first_run():
+    # Runs in a fresh interpreter: times imports plus the first script run,
+    # then uploading the fixture and rendering the default section
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(_SCRIPT, default_timeout=120).run()
+    cold = time.perf_counter() - start
+    rerun = _median(app)
+    errors = len(app.exception)
+
+    data = fixture_csv()
+    start = time.perf_counter()
+    app.sidebar.file_uploader[0].set_value(("fixture.csv", data, "text/csv")).run()
+    load = time.perf_counter() - start
+    loaded_rerun = _median(app)
+    # Sections catch their own failures and report them with st.error
+    errors += len(app.exception) + len(app.error)
+    print(f"{cold} {rerun} {load} {loaded_rerun} {errors}")
+
+
+def measure():
+    """
+    Time fc_script with Streamlit's app tester in a fresh interpreter: the
+    first run (imports included) and the median of five reruns, on the empty
+    page and after uploading a ``FIXTURE_ROWS``-row CSV. The upload run
+    parses the file and builds what the default section reads; the dataset
+    cache is a temporary directory, so nothing is served from earlier runs.
+
+    Returns:
+        dict: ``cold``, ``rerun``, ``load`` and ``loaded_rerun`` seconds and
+        the number of exceptions raised or errors shown.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    package = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(
+            os.environ, DASHBOARD_CACHE_DIR=cache_dir,
+            PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])),
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", f"from {package}.startup import _first_run; _first_run()"],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+    return {
+        "cold": float(out[-5]), "rerun": float(out[-4]),
+        "load": float(out[-3]), "loaded_rerun": float(out[-2]), "exceptions": int(out[-1]),
+    }
+
+
+def check(cold_budget=COLD_START_BUDGET, rerun_budget=RERUN_BUDGET, load_budget=LOAD_BUDGET):
+    """
+    Measure startup and loading and compare them with the budgets. Reruns
+    of the loaded page share ``rerun_budget`` with the empty page.
+
+    Returns:
+        bool: True if the script ran without exceptions and within all budgets.
+    """
+    result = measure()
+    print(f"cold start: {result['cold']:.2f}s (budget {cold_budget:.2f}s)")
+    print(f"rerun: {result['rerun']:.3f}s (budget {rerun_budget:.3f}s)")
+    print(f"load {FIXTURE_ROWS:,} rows: {result['load']:.2f}s (budget {load_budget:.2f}s)")
+    print(f"loaded rerun: {result['loaded_rerun']:.3f}s (budget {rerun_budget:.3f}s)")
+    if result["exceptions"]:
+        print(f"{result['exceptions']} exception(s) while running the script")
+    return (
+        not result["exceptions"]
+        and result["cold"] <= cold_budget
+        and result["rerun"] <= rerun_budget
+        and result["load"] <= load_budget
+        and result["loaded_rerun"] <= rerun_budget
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,13 @@
+# DASHBOARD/tests/test_sketches.py
+
+import numpy as np
+
+from DASHBOARD.sketches import HLL_P, KLL_K, RANK_ERROR, check_rank_error
+
+
+def test_sketch_errors_within_bounds():
+    # Smaller than the manual check's default so it stays quick in CI;
+    # check_rank_error raises when a bound is exceeded
+    errors = check_rank_error(n=100_000, trials=2)
+    assert errors["kll_rank_error"] <= RANK_ERROR / KLL_K
+    assert errors["hll_relative_error"] <= 3 * 1.04 / np.sqrt(2**HLL_P)
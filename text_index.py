@@ -0,0 +1,65 @@
+# DASHBOARD/text_index.py
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Case-insensitive substring index over a column's distinct values.
+
+    Every lower-cased distinct value is split into trigrams and each trigram
+    maps to the sorted ids of the values containing it. A query intersects
+    the posting lists of its own trigrams and only verifies the surviving
+    candidates, so the cost depends on the number of matching distinct
+    values rather than on the number of rows. Rows are reached through the
+    column's dictionary codes.
+    """
+
+    def __init__(self, dictionary):
+        self.values = pd.Series(dictionary, dtype=object).astype(str).str.lower().to_numpy()
+        postings = defaultdict(list)
+        for value_id, text in enumerate(self.values):
+            for gram in _trigrams(text):
+                postings[gram].append(value_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.nbytes = int(
+            sum(ids.nbytes for ids in self.postings.values())
+            + sum(len(text) for text in self.values)
+        )
+
+    def search(self, query):
+        """
+        Find the distinct values containing ``query`` (case-insensitive).
+
+        Returns:
+            np.ndarray: One boolean per dictionary entry.
+        """
+        query = query.lower()
+        hits = np.zeros(len(self.values), dtype=bool)
+        if len(query) < 3:
+            # Too short for trigrams; scan the distinct values instead of the rows
+            hits[:] = pd.Series(self.values).str.contains(query, regex=False).to_numpy()
+            return hits
+
+        lists = []
+        for gram in _trigrams(query):
+            if gram not in self.postings:
+                return hits
+            lists.append(self.postings[gram])
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                return hits
+
+        # Trigram overlap is necessary but not sufficient; confirm each candidate
+        hits[candidates] = [query in text for text in self.values[candidates]]
+        return hits
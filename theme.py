@@ -1,156 +1,144 @@
 # DASHBOARD/theme.py
 
+import re
+
 import streamlit as st
 
+# Colors per theme; "Royal" shares the dark palette
+PALETTES = {
+    "Dark": {
+        "background": "#0c0c0c", "text": "#ffd700", "sidebar": "#1a1a1a", "heading": "#ffd700",
+        "button": "#ffd700", "button_text": "black", "hover": "#e6c200",
+        "download": "#e6c200", "download_text": "black",
+    },
+    "Pink": {
+        "background": "#f8bbd0", "text": "#880e4f", "sidebar": "#f48fb1", "heading": "#880e4f",
+        "button": "#880e4f", "button_text": "white", "hover": "#c2185b",
+        "download": "#c2185b", "download_text": "white",
+    },
+    "Lavender": {
+        "background": "#e1bee7", "text": "#512da8", "sidebar": "#ce93d8", "heading": "#512da8",
+        "button": "#512da8", "button_text": "white", "hover": "#7e57c2",
+        "download": "#7e57c2", "download_text": "white",
+    },
+    "Yellow": {
+        "background": "#fff59d", "text": "#f57f17", "sidebar": "#fff176", "heading": "#f57f17",
+        "button": "#f57f17", "button_text": "white", "hover": "#ff9800",
+        "download": "#ff9800", "download_text": "white",
+    },
+    "Grey": {
+        "background": "#e0e0e0", "text": "#212121", "sidebar": "#bdbdbd", "heading": "#212121",
+        "button": "#212121", "button_text": "white", "hover": "#424242",
+        "download": "#424242", "download_text": "white",
+    },
+    "Pale Red": {
+        "background": "#ffebee", "text": "#c62828", "sidebar": "#ef9a9a", "heading": "#c62828",
+        "button": "#c62828", "button_text": "white", "hover": "#d32f2f",
+        "download": "#d32f2f", "download_text": "white",
+    },
+    "Pale Green": {
+        "background": "#e8f5e9", "text": "#388e3c", "sidebar": "#81c784", "heading": "#388e3c",
+        "button": "#388e3c", "button_text": "white", "hover": "#2c6b2f",
+        "download": "#2c6b2f", "download_text": "white",
+    },
+    "Rainbow": {
+        "background": "#f1c40f", "text": "#2c3e50", "sidebar": "#9b59b6", "heading": "#3498db",
+        "button": "#3498db", "button_text": "white", "hover": "#2980b9",
+        "download": "#e74c3c", "download_text": "white", "accent": "#f1c40f",
+    },
+    "Blue": {
+        "background": "#3498db", "text": "#ffffff", "sidebar": "#2980b9", "heading": "#ffffff",
+        "button": "#2980b9", "button_text": "white", "hover": "#1c638c",
+        "download": "#e74c3c", "download_text": "white",
+    },
+}
+PALETTES["Royal"] = PALETTES["Dark"]
+
+_TEMPLATE = """
+<style>
+    .stApp {{
+        background-color: {background};
+        color: {text};
+        font-family: 'Segoe UI', sans-serif;
+    }}
+    .stSidebar {{
+        background-color: {sidebar};
+    }}
+    h1, h2, h3, h4, h5 {{
+        color: {heading};
+    }}
+    .stButton > button {{
+        background-color: {button};
+        color: {button_text};
+        border: none;
+        font-weight: bold;
+    }}
+    .stButton > button:hover {{
+        background-color: {hover};
+        color: {button_text};
+    }}
+    .stDownloadButton > button {{
+        background-color: {download};
+        color: {download_text};
+    }}
+    .css-1d391kg, .css-1offfwp {{
+        background-color: {sidebar} !important;
+        color: {accent} !important;
+    }}
+    .css-10trblm {{
+        color: {accent} !important;
+    }}
+    .stDataFrame {{
+        background-color: {background};
+        color: {text};
+    }}
+</style>
+"""
+
+# Default Light Theme
+_LIGHT = """
+<style>
+    .stApp {
+        background-color: #f4f6fc;
+        color: #000;
+    }
+    .stSidebar {
+        background-color: #fff;
+    }
+    h1, h2, h3, h4 {
+        color: #0d47a1;
+    }
+    .stButton > button {
+        background-color: #2874f0;
+        color: white;
+        border: none;
+    }
+    .stButton > button:hover {
+        background-color: #0b3d91;
+    }
+    .stDownloadButton > button {
+        background-color: #ffc107;
+        color: black;
+    }
+</style>
+"""
+
+
+def _minify(css):
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", css).strip()
+
+
+# Built once at import; reruns only send the ready string
+THEME_CSS = {"Light": _minify(_LIGHT)}
+THEME_CSS.update(
+    (name, _minify(_TEMPLATE.format(**{"accent": palette["text"], **palette})))
+    for name, palette in PALETTES.items()
+)
+
+
 def apply_theme(theme):
-    if theme == "Dark" or theme == "Royal":
-        st.markdown("""
-            <style>
-                .stApp {
-                    background-color: #0c0c0c;
-                    color: #ffd700;
-                    font-family: 'Segoe UI', sans-serif;
-                }
-                .stSidebar {
-                    background-color: #1a1a1a;
-                }
-                h1, h2, h3, h4, h5 {
-                    color: #ffd700;
-                }
-                .stButton > button {
-                    background-color: #ffd700;
-                    color: black;
-                    border: none;
-                    font-weight: bold;
-                }
-                .stButton > button:hover {
-                    background-color: #e6c200;
-                    color: black;
-                }
-                .stDownloadButton > button {
-                    background-color: #e6c200;
-                    color: black;
-                }
-                .css-1d391kg, .css-1offfwp {
-                    background-color: #1a1a1a !important;
-                    color: #ffd700 !important;
-                }
-                .css-10trblm {
-                    color: #ffd700 !important;
-                }
-                .stDataFrame {
-                    background-color: #0c0c0c;
-                    color: #ffd700;
-                }
-            </style>
-        """, unsafe_allow_html=True)
-    elif theme == "Rainbow":
-        st.markdown("""
-            <style>
-                .stApp {
-                    background-color: #f1c40f; /* Yellow */
-                    color: #2c3e50; /* Dark Blue */
-                    font-family: 'Segoe UI', sans-serif;
-                }
-                .stSidebar {
-                    background-color: #9b59b6; /* Purple */
-                }
-                h1, h2, h3, h4, h5 {
-                    color: #3498db; /* Blue */
-                }
-                .stButton > button {
-                    background-color: #3498db;
-                    color: white;
-                    border: none;
-                    font-weight: bold;
-                }
-                .stButton > button:hover {
-                    background-color: #2980b9;
-                    color: white;
-                }
-                .stDownloadButton > button {
-                    background-color: #e74c3c; /* Red */
-                    color: white;
-                }
-                .css-1d391kg, .css-1offfwp {
-                    background-color: #9b59b6 !important;
-                    color: #f1c40f !important;
-                }
-                .css-10trblm {
-                    color: #f1c40f !important;
-                }
-                .stDataFrame {
-                    background-color: #f1c40f;
-                    color: #2c3e50;
-                }
-            </style>
-        """, unsafe_allow_html=True)
-    elif theme == "Blue":
-        st.markdown("""
-            <style>
-                .stApp {
-                    background-color: #3498db;
-                    color: #ffffff;
-                    font-family: 'Segoe UI', sans-serif;
-                }
-                .stSidebar {
-                    background-color: #2980b9;
-                }
-                h1, h2, h3, h4, h5 {
-                    color: #ffffff;
-                }
-                .stButton > button {
-                    background-color: #2980b9;
-                    color: white;
-                    border: none;
-                    font-weight: bold;
-                }
-                .stButton > button:hover {
-                    background-color: #1c638c;
-                    color: white;
-                }
-                .stDownloadButton > button {
-                    background-color: #e74c3c;
-                    color: white;
-                }
-                .css-1d391kg, .css-1offfwp {
-                    background-color: #2980b9 !important;
-                    color: #ffffff !important;
-                }
-                .css-10trblm {
-                    color: #ffffff !important;
-                }
-                .stDataFrame {
-                    background-color: #3498db;
-                    color: #ffffff;
-                }
-            </style>
-        """, unsafe_allow_html=True)
-    else:
-        # Default Light Theme
-        st.markdown("""
-            <style>
-                .stApp {
-                    background-color: #f4f6fc;
-                    color: #000;
-                }
-                .stSidebar {
-                    background-color: #fff;
-                }
-                h1, h2, h3, h4 {
-                    color: #0d47a1;
-                }
-                .stButton > button {
-                    background-color: #2874f0;
-                    color: white;
-                    border: none;
-                }
-                .stButton > button:hover {
-                    background-color: #0b3d91;
-                }
-                .stDownloadButton > button {
-                    background-color: #ffc107;
-                    color: black;
-                }
-            </style>
-        """, unsafe_allow_html=True)
+    """
+    Inject the precompiled CSS of a theme; unknown names get the light theme.
+    """
+    st.markdown(THEME_CSS.get(theme, THEME_CSS["Light"]), unsafe_allow_html=True)
@@ -0,0 +1,314 @@
+# DASHBOARD/type_inference.py
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# Number of non-null values inspected per column before committing to a type
+SAMPLE_SIZE = 10_000
+
+_BOOLEAN_VALUES = {"true": True, "false": False}
+_INT32 = np.iinfo(np.int32)
+
+
+def is_text(series):
+    """
+    True for columns holding raw text (object or pandas string dtype).
+    """
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+def _failed(original, converted):
+    """
+    Count values that were present before conversion but missing after it.
+    """
+    return int((original.notna() & converted.isna()).sum())
+
+
+def _to_boolean(series):
+    if series.dtype == bool:
+        return series
+    lowered = series.astype("string").str.strip().str.lower()
+    converted = lowered.map(_BOOLEAN_VALUES).astype("boolean")
+    return None if _failed(series, converted) else converted
+
+
+def _parse_numeric(series):
+    if pd.api.types.is_numeric_dtype(series) and series.dtype != bool:
+        return series
+    converted = pd.to_numeric(series, errors="coerce")
+    missed = series.notna() & converted.isna()
+    if missed.any():
+        # Retry only the leftovers with thousands separators removed
+        stripped = series[missed].astype(str).str.replace(",", "", regex=False).str.strip()
+        converted = converted.astype("float64")
+        converted[missed] = pd.to_numeric(stripped, errors="coerce")
+    return None if _failed(series, converted) else converted
+
+
+def _numeric_stats(converted):
+    """
+    Summarize a parsed numeric column; stats of chunks merge with _merge_stats.
+    """
+    nulls = int(converted.isna().sum())
+    present = len(converted) - nulls
+    if pd.api.types.is_float_dtype(converted):
+        values = converted.to_numpy(dtype="float64", na_value=np.nan)
+        values = values[~np.isnan(values)]
+        integral = bool(np.all(np.mod(values, 1) == 0))
+        lo, hi = (float(values.min()), float(values.max())) if present else (0, 0)
+    else:
+        integral = True
+        lo, hi = (int(converted.min()), int(converted.max())) if present else (0, 0)
+    return {
+        "any_float": pd.api.types.is_float_dtype(converted),
+        "integral": integral,
+        "present": present,
+        "nulls": nulls,
+        "lo": lo,
+        "hi": hi,
+    }
+
+
+def _merge_stats(left, right):
+    if left is None or not left["present"]:
+        return dict(right, nulls=right["nulls"] + (left["nulls"] if left else 0))
+    if not right["present"]:
+        return dict(left, nulls=left["nulls"] + right["nulls"])
+    return {
+        "any_float": left["any_float"] or right["any_float"],
+        "integral": left["integral"] and right["integral"],
+        "present": left["present"] + right["present"],
+        "nulls": left["nulls"] + right["nulls"],
+        "lo": min(left["lo"], right["lo"]),
+        "hi": max(left["hi"], right["hi"]),
+    }
+
+
+def _numeric_dtype(stats):
+    """
+    Pick the final numeric dtype.
+
+    Integral columns (usually ints with gaps) become integers, downcast to
+    int32 when the range allows it and nullable only when values are missing.
+    """
+    lo, hi = stats["lo"], stats["hi"]
+    exact = not stats["any_float"] or max(abs(lo), abs(hi)) < 2**53
+    if not stats["integral"] or not exact:
+        return "float64"
+    name = "int32" if _INT32.min <= lo and hi <= _INT32.max else "int64"
+    return name.capitalize() if stats["nulls"] else name
+
+
+def _to_numeric(series):
+    converted = _parse_numeric(series)
+    if converted is None:
+        return None
+    return converted.astype(_numeric_dtype(_numeric_stats(converted)))
+
+
+def _datetime_format(series):
+    """
+    Guess a strftime format from the first non-null value, or None.
+    """
+    index = series.first_valid_index()
+    if index is None:
+        return None
+    return guess_datetime_format(str(series.loc[index]).strip())
+
+
+def _to_datetime(series, fmt):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    try:
+        converted = pd.to_datetime(series, format=fmt, errors="coerce")
+    except (TypeError, ValueError):
+        return None
+    return None if _failed(series, converted) else converted
+
+
+def _convert(series, kind, fmt=None):
+    """
+    Convert ``series`` to ``kind`` in one vectorized pass.
+
+    Returns None when any non-null value does not fit the kind.
+    """
+    if kind == "boolean":
+        return _to_boolean(series)
+    if kind == "numeric":
+        return _to_numeric(series)
+    if kind == "datetime":
+        return _to_datetime(series, fmt)
+    raise ValueError(f"Unknown kind: {kind}")
+
+
+def _kind_of(series):
+    if series.dtype == bool or isinstance(series.dtype, pd.BooleanDtype):
+        return "boolean"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    return "text"
+
+
+def infer_column(series, sample_size=SAMPLE_SIZE):
+    """
+    Infer and apply the narrowest type that fits every value of a column.
+
+    Candidates are screened on a sample first; only those that survive are
+    tried on the full column, in the order boolean, numeric, datetime.
+
+    Args:
+        series (pd.Series): Raw column.
+        sample_size (int): Maximum number of non-null values to screen.
+
+    Returns:
+        tuple[pd.Series, dict]: Converted column and its report entry.
+    """
+    non_null = series.dropna()
+    sample = non_null
+    if len(non_null) > sample_size:
+        sample = non_null.sample(n=sample_size, random_state=0)
+
+    converted = series
+    if len(sample) and (is_text(series) or pd.api.types.is_numeric_dtype(series)):
+        fmt = _datetime_format(non_null) if is_text(series) else None
+        candidates = ["boolean", "numeric"] + (["datetime"] if fmt else [])
+        for kind in candidates:
+            if _convert(sample, kind, fmt) is None:
+                continue
+            result = _convert(series, kind, fmt)
+            if result is not None:
+                converted = result
+                break
+
+    report = {
+        "source_dtype": str(series.dtype),
+        "kind": _kind_of(converted),
+        "dtype": str(converted.dtype),
+        "nulls": int(len(series) - len(non_null)),
+        "sampled": int(len(sample)),
+    }
+    return converted, report
+
+
+def infer_types(df, sample_size=SAMPLE_SIZE):
+    """
+    Infer column types for a whole dataframe.
+
+    Missing values are kept as NA/NaT so numeric and datetime columns keep
+    their dtypes; nothing is filled with a placeholder.
+
+    Args:
+        df (pd.DataFrame): Raw dataframe.
+        sample_size (int): Maximum number of non-null values to screen per column.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: Typed dataframe and a per-column report.
+    """
+    if df.shape[1] == 0:
+        return df, {}
+
+    columns, report = [], {}
+    for i, name in enumerate(df.columns):
+        converted, report[name] = infer_column(df.iloc[:, i], sample_size)
+        columns.append(converted)
+
+    typed = pd.concat(columns, axis=1)
+    typed.columns = df.columns
+    typed.attrs = dict(df.attrs)
+    return typed, report
+
+
+_DATETIME_UNITS = ["s", "ms", "us", "ns"]
+
+
+class ChunkedInference:
+    """
+    Type inference over a stream of raw text chunks.
+
+    ``observe`` narrows each column's candidate kinds chunk by chunk and
+    ``convert`` applies the resulting plan to every chunk. A column keeps
+    the first kind that fits all of its values, exactly as in
+    ``infer_types``, so concatenating converted chunks gives the same frame
+    as inferring the whole file at once.
+    """
+
+    def __init__(self, n_columns):
+        self._columns = [
+            {"kinds": ["boolean", "numeric", "datetime"], "fmt": None, "non_null": 0,
+             "nulls": 0, "numeric": None, "unit": "s", "source_dtype": None}
+            for _ in range(n_columns)
+        ]
+
+    def observe(self, chunk):
+        """
+        Update the candidate kinds of every column with one raw chunk.
+        """
+        for i, state in enumerate(self._columns):
+            series = chunk.iloc[:, i]
+            state["source_dtype"] = state["source_dtype"] or str(series.dtype)
+            non_null = int(series.notna().sum())
+            state["nulls"] += len(series) - non_null
+            if not non_null:
+                continue
+            if not state["non_null"]:
+                # The format is guessed from the column's first value, as in infer_column
+                state["fmt"] = _datetime_format(series)
+                if state["fmt"] is None:
+                    state["kinds"].remove("datetime")
+            state["non_null"] += non_null
+
+            for kind in list(state["kinds"]):
+                if kind == "numeric":
+                    converted = _parse_numeric(series)
+                    if converted is not None:
+                        state["numeric"] = _merge_stats(state["numeric"], _numeric_stats(converted))
+                else:
+                    converted = _convert(series, kind, state["fmt"])
+                    if converted is not None and kind == "datetime":
+                        state["unit"] = max(state["unit"], converted.dt.unit, key=_DATETIME_UNITS.index)
+                if converted is None:
+                    state["kinds"].remove(kind)
+
+    def _kind(self, state):
+        return state["kinds"][0] if state["non_null"] and state["kinds"] else "text"
+
+    def convert(self, chunk):
+        """
+        Convert one raw chunk with the plan built from every observed chunk.
+        """
+        columns = []
+        for i, state in enumerate(self._columns):
+            series = chunk.iloc[:, i]
+            kind = self._kind(state)
+            if kind == "numeric":
+                series = _parse_numeric(series).astype(_numeric_dtype(state["numeric"]))
+            elif kind == "datetime":
+                # Chunks may parse at different resolutions; align them
+                series = _to_datetime(series, state["fmt"]).dt.as_unit(state["unit"])
+            elif kind == "boolean":
+                series = _to_boolean(series)
+            columns.append(series)
+
+        converted = pd.concat(columns, axis=1)
+        converted.columns = chunk.columns
+        return converted
+
+    def report(self, df):
+        """
+        Per-column report for the converted frame, in the infer_types format.
+        """
+        return {
+            name: {
+                "source_dtype": state["source_dtype"],
+                "kind": _kind_of(df.iloc[:, i]),
+                "dtype": str(df.iloc[:, i].dtype),
+                "nulls": state["nulls"],
+                "sampled": state["non_null"],
+            }
+            for i, (name, state) in enumerate(zip(df.columns, self._columns))
+        }
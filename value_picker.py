@@ -0,0 +1,122 @@
+# DASHBOARD/value_picker.py
+
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Checkboxes rendered per page; only the visible window gets widgets
+PAGE_SIZE = 50
+
+
+def _group(group):
+    # One session entry per group keeps every selection resettable in one step
+    if group not in st.session_state:
+        st.session_state[group] = {"generation": 0, "bits": {}, "versions": {}}
+    return st.session_state[group]
+
+
+def _toggle(bits, position):
+    bits[position >> 3] ^= 0x80 >> (position & 7)
+
+
+def _bump(state, key):
+    # New widget keys make the visible checkboxes pick up bulk changes
+    state["versions"][key] = state["versions"].get(key, 0) + 1
+
+
+def is_selected(bits, position):
+    """
+    Whether the value at ``position`` is set in a packed selection bitset.
+    """
+    return bool((bits[position >> 3] >> (7 - (position & 7))) & 1)
+
+
+def reset_pickers(group):
+    """
+    Drop every picker selection in ``group`` at once.
+
+    Widgets of the group are re-keyed by a generation counter, so none of
+    their per-widget state has to be visited.
+    """
+    state = _group(group)
+    st.session_state[group] = {"generation": state["generation"] + 1, "bits": {}, "versions": {}}
+
+
+def value_picker(label, values, key, group="value_pickers", search=None, counts=None, page_size=PAGE_SIZE):
+    """
+    Paged, searchable multi-select over a column's sorted distinct values.
+
+    The selection is a bitset over the column's dictionary codes
+    (``np.packbits`` layout, one bit per value), so "select all matching"
+    is a single vectorized update no matter how many values match.
+
+    Args:
+        label (str): Column name shown in the widgets.
+        values (pd.Index): Sorted distinct values of the column.
+        key (str): Identifies this picker within its group.
+        group (str): Session state entry holding this picker's selection;
+            see :func:`reset_pickers`.
+        search (callable): Maps a query to one boolean per value; defaults
+            to a case-insensitive substring scan of ``values``.
+        counts (np.ndarray): Optional row count per value, shown next to it.
+        page_size (int): Checkboxes rendered per page.
+
+    Returns:
+        np.ndarray: Packed selection bitset, usable as a ``"codes"`` filter
+        condition.
+    """
+    state = _group(group)
+    bits = state["bits"].get(key)
+    if bits is None or len(bits) != (len(values) + 7) // 8:
+        bits = state["bits"][key] = np.packbits(np.ones(len(values), dtype=bool))
+    prefix = f"{group}{state['generation']}_{key}"
+
+    query = st.text_input(f"🔎 Search in {label}", key=f"{prefix}_search")
+    if query:
+        if search is None:
+            text = pd.Series(values, dtype=object).astype(str)
+            hits = text.str.contains(query, case=False, regex=False).to_numpy()
+        else:
+            hits = search(query)
+        matching = np.flatnonzero(hits)
+    else:
+        hits = np.ones(len(values), dtype=bool)
+        matching = np.arange(len(values))
+
+    select_col, unselect_col = st.columns(2)
+    if select_col.button("✅ Select All Matching", key=f"{prefix}_select_all"):
+        bits |= np.packbits(hits)
+        _bump(state, key)
+    if unselect_col.button("🚫 Unselect All Matching", key=f"{prefix}_unselect"):
+        bits &= ~np.packbits(hits)
+        _bump(state, key)
+
+    pages = max(1, math.ceil(len(matching) / page_size))
+    page = 1
+    if pages > 1:
+        # Keyed by the query so the pager starts over for every new search
+        page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"{prefix}_page_{query}")
+    window = matching[(page - 1) * page_size: page * page_size]
+    if len(window):
+        st.caption(
+            f"{int(np.unpackbits(bits).sum()):,} of {len(values):,} selected · "
+            f"showing {(page - 1) * page_size + 1:,}–{(page - 1) * page_size + len(window):,} "
+            f"of {len(matching):,} matching"
+        )
+
+    version = state["versions"].get(key, 0)
+    for position in window:
+        text = f"{values[position]}"
+        if counts is not None:
+            text += f" ({counts[position]:,})"
+        st.checkbox(
+            text,
+            value=is_selected(bits, position),
+            key=f"{prefix}_{version}_{position}_chk",
+            on_change=_toggle,
+            args=(bits, int(position)),
+        )
+
+    return bits